@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+extractLinks benchmark: per-link CDP round-trips vs a single in-page evaluation.
+
+Serves a fixture page with thousands of links from a local HTTP server and
+times the previous per-link implementation against _EXTRACT_LINKS_SCRIPT.
+
+Usage:
+    uv run python benchmarks/extract_links.py [--links 5000] [--runs 5]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from playwright.async_api import async_playwright
+
+from fixtures import FixtureServer, links_page
+from mudae.main import _EXTRACT_LINKS_SCRIPT
+
+
+async def per_link(element) -> list[dict]:
+    links = await element.query_selector_all("a")
+    link_data = []
+    for link in links:
+        href = await link.get_attribute("href")
+        text = await link.text_content()
+        link_data.append({"href": href, "text": text})
+    return link_data
+
+
+async def batched(element) -> list[dict]:
+    return await element.evaluate(
+        _EXTRACT_LINKS_SCRIPT,
+        {"absolute": False, "dedupe": False, "domain": None, "pattern": None},
+    )
+
+
+async def run(links: int, runs: int) -> None:
+    with FixtureServer({"/links": links_page(links)}) as server:
+        async with async_playwright() as playwright:
+            browser = await playwright.chromium.launch(headless=True)
+            page = await browser.new_page()
+            await page.goto(server.url("/links"))
+            element = await page.query_selector("#links")
+
+            for name, extract in (("per-link", per_link), ("batched", batched)):
+                samples = []
+                for _ in range(runs):
+                    started = time.perf_counter()
+                    result = await extract(element)
+                    samples.append(time.perf_counter() - started)
+                print(
+                    f"{name:<10} {len(result):6d} links   "
+                    f"median {statistics.median(samples) * 1000:9.1f} ms   "
+                    f"min {min(samples) * 1000:9.1f} ms"
+                )
+
+            await browser.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--links", type=int, default=5000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.links, args.runs))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Generated fixture pages and a local HTTP server to serve them from.
+
+Pages are generated in memory and served from a background thread, so
+benchmarks never depend on the network.
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def links_page(count: int) -> str:
+    """A page with `count` links in a nav, mixing relative, absolute and duplicate hrefs"""
+    items = []
+    for i in range(count):
+        if i % 3 == 0:
+            href = f"/docs/page-{i}"
+        elif i % 3 == 1:
+            href = f"https://cdn{i % 5}.example.com/asset-{i}"
+        else:
+            href = f"/docs/page-{i - 2}"
+        items.append(f'<li><a href="{href}">Link {i}</a></li>')
+    return (
+        "<!doctype html><html><head><title>Links</title></head><body>"
+        f'<nav id="links"><ul>{"".join(items)}</ul></nav>'
+        "</body></html>"
+    )
+
+
+def form_page(fields: int) -> str:
+    """A form with `fields` labelled inputs, selects and checkboxes, plus a submit button"""
+    rows = []
+    for i in range(fields):
+        kind = i % 3
+        if kind == 0:
+            control = f'<input id="field-{i}" name="field-{i}" placeholder="Value {i}">'
+        elif kind == 1:
+            control = (
+                f'<select id="field-{i}"><option>One</option><option>Two</option></select>'
+            )
+        else:
+            control = f'<input id="field-{i}" type="checkbox">'
+        rows.append(f'<div><label for="field-{i}">Field {i}</label>{control}</div>')
+    return (
+        "<!doctype html><html><head><title>Form</title></head><body>"
+        f'<main><form id="form">{"".join(rows)}<button type="submit">Submit</button></form></main>'
+        "</body></html>"
+    )
+
+
+def long_page(sections: int) -> str:
+    """A tall article page with `sections` headed sections of text and an image placeholder"""
+    body = []
+    for i in range(sections):
+        body.append(
+            f"<section><h2>Section {i}</h2>"
+            f"<p>{'Lorem ipsum dolor sit amet, consectetur adipiscing elit. ' * 20}</p>"
+            f'<div style="height:200px;background:hsl({i * 37 % 360},60%,70%)"></div>'
+            "</section>"
+        )
+    return (
+        "<!doctype html><html><head><title>Long page</title></head><body>"
+        f"<main><article>{''.join(body)}</article></main>"
+        "</body></html>"
+    )
+
+
+def deep_page(depth: int, breadth: int = 2) -> str:
+    """A DOM nested `depth` divs deep, with a button and a link at every level"""
+    opening = []
+    for i in range(depth):
+        siblings = "".join(f"<span>Text {i}.{j}</span>" for j in range(breadth))
+        opening.append(
+            f'<div class="level-{i}">{siblings}'
+            f'<button id="button-{i}">Button {i}</button><a href="/deep#{i}">Link {i}</a>'
+        )
+    return (
+        "<!doctype html><html><head><title>Deep DOM</title></head><body><main>"
+        f"{''.join(opening)}{'</div>' * depth}"
+        "</main></body></html>"
+    )
+
+
+def landmarks_page(count: int, links: int = 10) -> str:
+    """A page with `count` labelled regions and navs, each holding links and a button"""
+    blocks = []
+    for i in range(count):
+        anchors = "".join(f'<a href="/section-{i}/{j}">Item {i}.{j}</a>' for j in range(links))
+        tag = "nav" if i % 4 == 0 else "section"
+        blocks.append(
+            f'<{tag} aria-label="Area {i}"><h2>Area {i}</h2>{anchors}'
+            f"<button>Open {i}</button></{tag}>"
+        )
+    return (
+        "<!doctype html><html><head><title>Landmarks</title></head><body>"
+        '<header><a href="/">Home</a></header>'
+        f"<main>{''.join(blocks)}</main>"
+        "<footer><a href=\"/about\">About</a></footer>"
+        "</body></html>"
+    )
+
+
+class FixtureServer:
+    """Serve a {path: html} mapping on localhost for the lifetime of a with-block"""
+
+    def __init__(self, pages: dict[str, str]):
+        self.pages = pages
+        self._server: ThreadingHTTPServer | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, path: str) -> str:
+        return f"{self.base_url}{path}"
+
+    def __enter__(self) -> "FixtureServer":
+        pages = self.pages
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = pages.get(self.path.split("?")[0])
+                if body is None:
+                    self.send_error(404)
+                    return
+                data = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
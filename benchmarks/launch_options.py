@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Browser launch configuration benchmark.
+
+Compares per-navigation and screenshot cost across headless/headed mode,
+the tuned default Chromium flags vs Playwright's defaults, and device scale
+factors, using the same LaunchOptions the server builds from its settings.
+Headed configurations are skipped when no display is available.
+
+Usage:
+    uv run python benchmarks/launch_options.py [--runs 10]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from playwright.async_api import async_playwright
+
+from fixtures import FixtureServer, long_page
+from mudae.main import LaunchOptions
+
+CONFIGURATIONS = {
+    "headless, tuned flags": LaunchOptions(),
+    "headless, playwright flags": LaunchOptions(args=[]),
+    "headless, tuned, dpr 2": LaunchOptions(device_scale_factor=2),
+    "headed, tuned flags": LaunchOptions(headless=False),
+}
+
+
+async def measure(playwright, options: LaunchOptions, url: str, runs: int) -> dict:
+    started = time.perf_counter()
+    browser = await playwright.chromium.launch(
+        headless=options.headless, args=options.args
+    )
+    launch = time.perf_counter() - started
+
+    context = await browser.new_context(**options.context_options())
+    page = await context.new_page()
+    navigations, screenshots = [], []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await page.goto(url)
+        navigations.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await page.screenshot(full_page=True, type="jpeg", quality=50)
+        screenshots.append(time.perf_counter() - started)
+
+    await browser.close()
+    return {
+        "launch": launch,
+        "navigate": statistics.median(navigations),
+        "screenshot": statistics.median(screenshots),
+    }
+
+
+async def run(runs: int) -> None:
+    has_display = bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+    with FixtureServer({"/long": long_page(200)}) as server:
+        async with async_playwright() as playwright:
+            print(f"{'configuration':<28} {'launch':>10} {'navigate':>10} {'screenshot':>11}")
+            for name, options in CONFIGURATIONS.items():
+                if not options.headless and not has_display:
+                    print(f"{name:<28} skipped (no display)")
+                    continue
+                result = await measure(playwright, options, server.url("/long"), runs)
+                print(
+                    f"{name:<28} {result['launch'] * 1000:8.0f}ms "
+                    f"{result['navigate'] * 1000:8.1f}ms {result['screenshot'] * 1000:9.1f}ms"
+                )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(run(args.runs))
+
+
+if __name__ == "__main__":
+    main()
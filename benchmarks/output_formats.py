@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Output format benchmark: payload size and serialization time per format.
+
+Takes accessibility snapshots of fixture pages (and any URLs given on the
+command line) and serializes them with json.dumps(indent=2), the previous
+output, and with each of mudae's pretty/compact/text formats.
+
+Usage:
+    uv run python benchmarks/output_formats.py [URL ...]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from playwright.async_api import async_playwright
+
+from fixtures import FixtureServer, form_page, links_page, long_page
+from mudae.main import _dump, _filter_interactive_elements
+
+FORMATS = {
+    "json.dumps indent=2": lambda payload: json.dumps(payload, indent=2),
+    "pretty": lambda payload: _dump(payload, "pretty"),
+    "compact": lambda payload: _dump(payload, "compact"),
+    "text": lambda payload: _dump(payload, "text"),
+}
+
+
+def measure(name: str, payload: dict, runs: int = 20) -> None:
+    print(name)
+    for label, serialize in FORMATS.items():
+        started = time.perf_counter()
+        for _ in range(runs):
+            output = serialize(payload)
+        elapsed = (time.perf_counter() - started) / runs
+        print(
+            f"  {label:<22} {len(output.encode()):>10,d} bytes   {elapsed * 1000:8.2f} ms"
+        )
+
+
+async def run(urls: list[str]) -> None:
+    pages = {
+        "/links": links_page(3000),
+        "/form": form_page(300),
+        "/long": long_page(300),
+    }
+    with FixtureServer(pages) as server:
+        targets = [server.url(path) for path in pages] + urls
+        async with async_playwright() as playwright:
+            browser = await playwright.chromium.launch(headless=True)
+            page = await browser.new_page()
+            for url in targets:
+                await page.goto(url)
+                tree = await page.accessibility.snapshot()
+                measure(f"{url} (accessibility)", {"type": "accessibility", "snapshot": tree})
+                measure(
+                    f"{url} (accessibility_summary)",
+                    {"type": "accessibility_summary", "snapshot": _filter_interactive_elements(tree)},
+                )
+            await browser.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("urls", nargs="*", help="Extra real-world pages to measure")
+    args = parser.parse_args()
+    asyncio.run(run(args.urls))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+accessibility_summary engine benchmark: Playwright snapshot vs CDP queryAXTree.
+
+For each fixture page (and any URLs given on the command line), times the
+'playwright' engine (full page.accessibility.snapshot() filtered in Python)
+against the 'cdp' engine (per-role queryAXTree, filtered in the browser),
+and reports the size of the data each one moves into Python: the snapshot
+for 'playwright', and every CDP response and event for 'cdp'.
+
+Usage:
+    uv run python benchmarks/snapshot_engines.py [URL ...] [--runs 5]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from playwright.async_api import async_playwright
+from pydantic_core import to_json
+
+from fixtures import FixtureServer, form_page, links_page, long_page
+from mudae.main import Session, _cdp_interactive_tree, _filter_interactive_elements
+
+
+class MeasuredCDPSession:
+    """CDP session wrapper that adds up the JSON size of responses and events"""
+
+    def __init__(self, cdp):
+        self.cdp = cdp
+        self.received = 0
+        self._listeners = {}
+
+    async def send(self, method: str, params: dict | None = None) -> dict:
+        result = await self.cdp.send(method, params)
+        self.received += len(to_json(result))
+        return result
+
+    def on(self, event: str, handler) -> None:
+        def measured(payload):
+            self.received += len(to_json(payload))
+            handler(payload)
+
+        self._listeners[handler] = measured
+        self.cdp.on(event, measured)
+
+    def remove_listener(self, event: str, handler) -> None:
+        self.cdp.remove_listener(event, self._listeners.pop(handler))
+
+
+async def run(urls: list[str], runs: int) -> None:
+    pages = {
+        "/links": links_page(3000),
+        "/form": form_page(300),
+        "/long": long_page(300),
+    }
+    with FixtureServer(pages) as server:
+        targets = [server.url(path) for path in pages] + urls
+        async with async_playwright() as playwright:
+            browser = await playwright.chromium.launch(headless=True)
+            context = await browser.new_context()
+            page = await context.new_page()
+            session = Session(context=context, page=page)
+            cdp = MeasuredCDPSession(await context.new_cdp_session(page))
+            session.cdp = cdp
+
+            for url in targets:
+                await page.goto(url)
+                print(url)
+
+                samples = []
+                for _ in range(runs):
+                    started = time.perf_counter()
+                    tree = await page.accessibility.snapshot()
+                    _filter_interactive_elements(tree)
+                    samples.append(time.perf_counter() - started)
+                print(
+                    f"  {'playwright':<12} {statistics.median(samples) * 1000:9.1f} ms"
+                    f"   {len(to_json(tree)):>10,d} bytes received"
+                )
+
+                samples = []
+                for _ in range(runs):
+                    cdp.received = 0
+                    started = time.perf_counter()
+                    await _cdp_interactive_tree(session)
+                    samples.append(time.perf_counter() - started)
+                print(
+                    f"  {'cdp':<12} {statistics.median(samples) * 1000:9.1f} ms"
+                    f"   {cdp.received:>10,d} bytes received"
+                )
+
+            await browser.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("urls", nargs="*", help="Extra real-world pages to measure")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.urls, args.runs))
+
+
+if __name__ == "__main__":
+    main()
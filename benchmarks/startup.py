@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark for the mudae entry point.
+
+Spawns the server over stdio and measures how long it takes until the client
+has completed `initialize` and received the tool list, compared with the cost
+of simply importing the server module.
+
+Usage:
+    uv run python benchmarks/startup.py [--runs 10]
+"""
+
+import argparse
+import asyncio
+import statistics
+import subprocess
+import sys
+import time
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+
+def measure_import() -> float:
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import mudae.main"], check=True)
+    return time.perf_counter() - started
+
+
+async def measure_list_tools() -> float:
+    # The same path as the `mudae` console script, argument and env handling included
+    params = StdioServerParameters(
+        command=sys.executable, args=["-c", "from mudae.main import main; main()"]
+    )
+    started = time.perf_counter()
+    async with stdio_client(params) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            await session.list_tools()
+            elapsed = time.perf_counter() - started
+    return elapsed
+
+
+def report(name: str, samples: list[float]) -> None:
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    print(
+        f"{name:<24} median {statistics.median(samples) * 1000:8.1f} ms"
+        f"   p95 {p95 * 1000:8.1f} ms   (n={len(samples)})"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    report("import mudae.main", [measure_import() for _ in range(args.runs)])
+    report(
+        "initialize + list_tools",
+        [asyncio.run(measure_list_tools()) for _ in range(args.runs)],
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+End-to-end tool benchmark suite against generated fixture pages.
+
+Runs the FastMCP server in-process (lifespan included, headless Chromium),
+serves fixture pages from a local HTTP server, and calls each tool through
+an MCP client session the way an agent would. Reports p50/p95 latency,
+response size, and the memory of this process and its browser processes.
+
+Results can be saved and compared against a previous run, failing when a
+case's p50 latency or response size grows past a threshold.
+
+Usage:
+    uv run python benchmarks/suite.py [--runs 20] [--only SUBSTRING]
+    uv run python benchmarks/suite.py --save baseline.json
+    uv run python benchmarks/suite.py --compare baseline.json [--threshold 1.25]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import statistics
+import sys
+import time
+from dataclasses import dataclass, field
+
+# Settings are read from the environment when the server starts
+os.environ.setdefault("MUDAE_HEADLESS", "1")
+os.environ.setdefault("MUDAE_OUTPUT_FORMAT", "compact")
+# Always launch a private browser rather than attaching to a running one
+os.environ.setdefault("LOCAL_CDP_URL", "http://127.0.0.1:9")
+
+from mcp.shared.memory import create_connected_server_and_client_session
+
+from fixtures import (
+    FixtureServer,
+    deep_page,
+    form_page,
+    landmarks_page,
+    links_page,
+    long_page,
+)
+from mudae.main import mcp
+
+PAGES = {
+    "/links": links_page(5000),
+    "/deep": deep_page(400),
+    "/landmarks": landmarks_page(200),
+    "/long": long_page(300),
+    "/form": form_page(300),
+}
+
+
+@dataclass
+class Case:
+    name: str
+    tool: str
+    arguments: dict
+    page: str
+    # Navigate to the page (untimed) before every sample, so per-session
+    # snapshot caches never answer and each sample does the full work
+    fresh: bool = True
+
+
+CASES = [
+    Case("navigate long", "navigate", {"type": "url", "url": "{base}/long"}, "/long"),
+    Case(
+        "summary landmarks playwright",
+        "getSnapshot",
+        {"type": "accessibility_summary", "engine": "playwright"},
+        "/landmarks",
+    ),
+    Case(
+        "summary landmarks cdp",
+        "getSnapshot",
+        {"type": "accessibility_summary", "engine": "cdp"},
+        "/landmarks",
+    ),
+    Case(
+        "summary landmarks cached",
+        "getSnapshot",
+        {"type": "accessibility_summary"},
+        "/landmarks",
+        fresh=False,
+    ),
+    Case(
+        "summary deep playwright",
+        "getSnapshot",
+        {"type": "accessibility_summary", "engine": "playwright"},
+        "/deep",
+    ),
+    Case(
+        "summary deep cdp",
+        "getSnapshot",
+        {"type": "accessibility_summary", "engine": "cdp"},
+        "/deep",
+    ),
+    Case(
+        "summary form 4k tokens",
+        "getSnapshot",
+        {"type": "accessibility_summary", "max_tokens": 4000},
+        "/form",
+    ),
+    Case("full tree deep", "getSnapshot", {"type": "accessibility"}, "/deep"),
+    Case(
+        "scoped nav",
+        "getSnapshot",
+        {"type": "accessibility_scoped", "selector_type": "id", "selector": "links"},
+        "/links",
+    ),
+    Case(
+        "screenshot viewport jpeg",
+        "getSnapshot",
+        {"type": "image", "full_page": False, "image_format": "jpeg"},
+        "/long",
+    ),
+    Case(
+        "screenshot tiles",
+        "getSnapshot",
+        {"type": "image_tiles", "tile_count": 3, "image_format": "jpeg"},
+        "/long",
+    ),
+    Case(
+        "extractLinks",
+        "getElement",
+        {"type": "id", "selector": "links", "action": "extractLinks"},
+        "/links",
+        fresh=False,
+    ),
+    Case(
+        "extractLinks deduped absolute",
+        "getElement",
+        {
+            "type": "id",
+            "selector": "links",
+            "action": "extractLinks",
+            "dedupe": True,
+            "absolute_urls": True,
+        },
+        "/links",
+        fresh=False,
+    ),
+    Case(
+        "getRawElement",
+        "getElement",
+        {"type": "id", "selector": "button-200", "action": "getRawElement", "include_box": True},
+        "/deep",
+        fresh=False,
+    ),
+    Case(
+        "fillInput",
+        "fillInput",
+        {"type": "id", "selector": "field-0", "value": "benchmark"},
+        "/form",
+        fresh=False,
+    ),
+    Case(
+        "batch fill 3 fields",
+        "batchActions",
+        {
+            "steps": [
+                {"tool": "fillInput", "type": "id", "selector": f"field-{i}", "value": "x"}
+                for i in (0, 3, 6)
+            ]
+        },
+        "/form",
+        fresh=False,
+    ),
+    # landmarks_page marks its blocks up as <section> and <nav>, with no explicit roles
+    Case("exploreByRole section", "exploreByRole", {"role": "section"}, "/landmarks"),
+    Case("exploreByRole navigation", "exploreByRole", {"role": "navigation"}, "/landmarks"),
+]
+
+
+@dataclass
+class CaseResult:
+    name: str
+    latencies: list[float] = field(default_factory=list)
+    sizes: list[int] = field(default_factory=list)
+    errors: int = 0
+    rss_kb: int | None = None
+
+    def summary(self) -> dict:
+        ordered = sorted(self.latencies)
+        return {
+            "name": self.name,
+            "runs": len(ordered),
+            "errors": self.errors,
+            "p50_ms": statistics.median(ordered) * 1000,
+            "p95_ms": ordered[min(len(ordered) - 1, round(0.95 * (len(ordered) - 1)))] * 1000,
+            "bytes": int(statistics.median(self.sizes)),
+            "rss_kb": self.rss_kb,
+        }
+
+
+def content_bytes(result) -> int:
+    size = 0
+    for item in result.content:
+        if item.type == "text":
+            size += len(item.text.encode())
+        elif item.type == "image":
+            size += len(item.data)
+    return size
+
+
+def is_error(result) -> bool:
+    first = result.content[0] if result.content else None
+    return bool(result.isError) or (
+        first is not None
+        and first.type == "text"
+        and first.text.startswith(("Error", "Element not found"))
+    )
+
+
+def process_tree_rss_kb() -> int | None:
+    """Resident memory of this process and all its descendants, from /proc (Linux only)"""
+    if not os.path.isdir("/proc"):
+        return None
+    children: dict[int, list[int]] = {}
+    rss: dict[int, int] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name may contain spaces; fields resume after ')'
+                fields = f.read().rsplit(")", 1)[1].split()
+            with open(f"/proc/{entry}/statm") as f:
+                resident_pages = int(f.read().split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        pid = int(entry)
+        children.setdefault(int(fields[1]), []).append(pid)
+        rss[pid] = resident_pages * os.sysconf("SC_PAGE_SIZE") // 1024
+
+    total = 0
+    stack = [os.getpid()]
+    while stack:
+        pid = stack.pop()
+        total += rss.get(pid, 0)
+        stack.extend(children.get(pid, []))
+    return total
+
+
+async def call(client, tool: str, arguments: dict):
+    return await client.call_tool(tool, {"input": arguments})
+
+
+async def run(runs: int, only: str | None) -> list[dict]:
+    cases = [case for case in CASES if not only or only in case.name]
+    results = []
+    with FixtureServer(PAGES) as server:
+        async with create_connected_server_and_client_session(mcp._mcp_server) as client:
+            # The first call pays for starting Playwright and the browser
+            started = time.perf_counter()
+            await call(client, "navigate", {"type": "url", "url": server.url("/form")})
+            print(f"{'cold start + first navigate':<32} {(time.perf_counter() - started) * 1000:9.1f} ms")
+            print()
+            print(
+                f"{'case':<32} {'p50 ms':>9} {'p95 ms':>9} {'bytes':>11} {'errors':>7} {'rss MB':>8}"
+            )
+
+            for case in cases:
+                arguments = json.loads(
+                    json.dumps(case.arguments).replace("{base}", server.base_url)
+                )
+                page_url = {"type": "url", "url": server.url(case.page)}
+                await call(client, "navigate", page_url)
+
+                result = CaseResult(case.name)
+                # One warm-up call, not counted
+                for sample in range(runs + 1):
+                    if case.fresh and sample:
+                        await call(client, "navigate", page_url)
+                    started = time.perf_counter()
+                    response = await call(client, case.tool, arguments)
+                    elapsed = time.perf_counter() - started
+                    if not sample:
+                        continue
+                    result.latencies.append(elapsed)
+                    result.sizes.append(content_bytes(response))
+                    result.errors += is_error(response)
+                result.rss_kb = process_tree_rss_kb()
+
+                summary = result.summary()
+                results.append(summary)
+                rss = f"{summary['rss_kb'] / 1024:8.0f}" if summary["rss_kb"] else f"{'-':>8}"
+                print(
+                    f"{case.name:<32} {summary['p50_ms']:9.1f} {summary['p95_ms']:9.1f} "
+                    f"{summary['bytes']:11,d} {summary['errors']:7d} {rss}"
+                )
+
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print()
+    print(f"peak Python RSS {peak_mb:.0f} MB")
+    return results
+
+
+def compare(results: list[dict], baseline_path: str, threshold: float) -> bool:
+    """Print regressions against a saved run; return True if there are none"""
+    with open(baseline_path) as f:
+        baseline = {entry["name"]: entry for entry in json.load(f)["results"]}
+
+    ok = True
+    print()
+    print(f"compared with {baseline_path} (threshold x{threshold})")
+    for entry in results:
+        before = baseline.get(entry["name"])
+        if before is None:
+            continue
+        for key in ("p50_ms", "bytes"):
+            if before[key] and entry[key] > before[key] * threshold:
+                ok = False
+                print(
+                    f"  REGRESSION {entry['name']}: {key} {before[key]:,.1f} -> {entry[key]:,.1f}"
+                )
+        if entry["errors"] > before["errors"]:
+            ok = False
+            print(f"  REGRESSION {entry['name']}: errors {before['errors']} -> {entry['errors']}")
+    if ok:
+        print("  no regressions")
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--only", help="Run only cases whose name contains this text")
+    parser.add_argument("--save", metavar="PATH", help="Write the results as JSON")
+    parser.add_argument("--compare", metavar="PATH", help="Compare with results saved by --save")
+    parser.add_argument(
+        "--threshold", type=float, default=1.25,
+        help="Allowed growth factor for p50 latency and bytes when comparing",
+    )
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.runs, args.only))
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"runs": args.runs, "results": results}, f, indent=2)
+    if args.compare and not compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Accessibility tree filter micro-benchmark on synthetic trees.
+
+Compares the previous recursive _filter_interactive_elements and
+_has_interactive_children (reproduced below as the baseline) with the
+single-pass _process_accessibility_tree, on a wide ~100k-node tree and on a
+deep chain that exceeds Python's recursion limit.
+
+Usage:
+    uv run python benchmarks/tree_filter.py [--nodes 100000] [--runs 5]
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from mudae.main import _process_accessibility_tree
+
+ROLES = ["generic", "link", "button", "list", "listitem", "text", "navigation", "main"]
+
+
+def recursive_filter(node, max_depth=3, current_depth=0):
+    """The recursive filter as it was before the single-pass rewrite"""
+    if not node or current_depth > max_depth:
+        return None
+    interactive_roles = {
+        'button', 'link', 'textbox', 'combobox', 'listbox', 'option',
+        'checkbox', 'radio', 'tab', 'menuitem', 'treeitem', 'gridcell',
+        'columnheader', 'rowheader', 'searchbox', 'slider', 'spinbutton'
+    }
+    structural_roles = {'main', 'navigation', 'banner', 'contentinfo', 'form', 'region'}
+    result = None
+    filtered_children = []
+    for child in node.get('children', []):
+        filtered_child = recursive_filter(child, max_depth, current_depth + 1)
+        if filtered_child:
+            filtered_children.append(filtered_child)
+    role = node.get('role', '').lower()
+    if role in interactive_roles or role in structural_roles or filtered_children or current_depth == 0:
+        result = {'role': node.get('role'), 'name': node.get('name')}
+        if role in interactive_roles:
+            for attr in ['value', 'checked', 'selected', 'expanded', 'disabled', 'level']:
+                if attr in node:
+                    result[attr] = node[attr]
+        if filtered_children:
+            result['children'] = filtered_children
+    return result
+
+
+def recursive_has_interactive(node):
+    """The recursive interactive check as it was before the single-pass rewrite"""
+    if not node:
+        return False
+    interactive_roles = {
+        'button', 'link', 'textbox', 'combobox', 'listbox', 'option',
+        'checkbox', 'radio', 'tab', 'menuitem', 'treeitem', 'gridcell',
+        'columnheader', 'rowheader', 'searchbox', 'slider', 'spinbutton'
+    }
+    if node.get('role', '').lower() in interactive_roles:
+        return True
+    return any(recursive_has_interactive(child) for child in node.get('children', []))
+
+
+def wide_tree(nodes: int, fanout: int = 8) -> dict:
+    """A random tree of about `nodes` nodes, built breadth-first with the given fanout"""
+    rng = random.Random(0)
+    root = {"role": "WebArea", "name": "root"}
+    queue = [root]
+    made = 1
+    while queue and made < nodes:
+        parent = queue.pop(0)
+        parent["children"] = []
+        for _ in range(min(fanout, nodes - made)):
+            child = {"role": rng.choice(ROLES), "name": f"node {made}"}
+            parent["children"].append(child)
+            queue.append(child)
+            made += 1
+    return root
+
+
+def deep_chain(depth: int) -> dict:
+    root = node = {"role": "WebArea", "name": "root"}
+    for i in range(depth):
+        child = {"role": "generic", "name": f"level {i}"}
+        node["children"] = [child]
+        node = child
+    node["role"] = "button"
+    return root
+
+
+def time_it(func, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--nodes", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    tree = wide_tree(args.nodes)
+    print(f"wide tree, {args.nodes:,d} nodes")
+    rows = {
+        "recursive filter (max_depth=3)": lambda: recursive_filter(tree),
+        "single pass (max_depth=3)": lambda: _process_accessibility_tree(tree),
+        "recursive filter (no depth limit)": lambda: recursive_filter(tree, max_depth=10**9),
+        "single pass (no depth limit)": lambda: _process_accessibility_tree(tree, max_depth=None),
+        "recursive interactive check": lambda: recursive_has_interactive(tree),
+        "single pass, full (flags + counts)": lambda: _process_accessibility_tree(
+            tree, max_depth=0, full=True
+        ),
+    }
+    for name, func in rows.items():
+        print(f"  {name:<38} {time_it(func, args.runs) * 1000:9.1f} ms")
+
+    chain = deep_chain(10_000)
+    print("deep chain, 10,000 levels")
+    try:
+        recursive_has_interactive(chain)
+        print(f"  {'recursive interactive check':<38} ok")
+    except RecursionError:
+        print(f"  {'recursive interactive check':<38} RecursionError")
+    started = time.perf_counter()
+    result = _process_accessibility_tree(chain, max_depth=None)
+    print(
+        f"  {'single pass (no depth limit)':<38} "
+        f"{(time.perf_counter() - started) * 1000:9.1f} ms"
+        f" (has_interactive={result.has_interactive})"
+    )
+
+
+if __name__ == "__main__":
+    main()
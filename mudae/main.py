@@ -19,57 +19,1425 @@ The server can connect to existing browser instances via Chrome DevTools Protoco
 or launch new browser instances as needed.
 """
 
+from __future__ import annotations
+
+import argparse
+import asyncio
+import fnmatch
+import functools
+import hashlib
+import heapq
 import json
+import math
 import os
-from contextlib import asynccontextmanager
+import shlex
+import sys
+import time
+from collections import Counter, OrderedDict
+from contextlib import asynccontextmanager, contextmanager
 from collections.abc import AsyncIterator
-from dataclasses import dataclass
+from dataclasses import dataclass, field, replace
+from email.utils import parsedate_to_datetime
 from mcp.server.fastmcp import FastMCP
-from playwright.async_api import async_playwright, Page, Browser, BrowserContext
+from mcp.types import ImageContent, TextContent
 from pydantic import BaseModel, Field
-from typing import Literal
+from pydantic_core import to_json
+from typing import TYPE_CHECKING, Annotated, Literal
+from urllib.parse import urlsplit
+
+if TYPE_CHECKING:
+    # Playwright is imported lazily in BrowserManager.start() to keep server startup fast
+    from playwright.async_api import (
+        Page,
+        Browser,
+        BrowserContext,
+        CDPSession,
+        Playwright,
+        ElementHandle,
+        Request,
+        Route,
+    )
+
+
+DEFAULT_SESSION_ID = "default"
+
+# Maximum number of concurrent per-section snapshots in exploreByRole
+EXPLORE_CONCURRENCY = 8
+
+# Rough size of a model token, for converting token budgets to bytes
+BYTES_PER_TOKEN = 4
+
+# How long to wait for an element ref to resolve before reporting it missing
+REF_TIMEOUT_MS = 2000
+
+# How long a browser may take to answer a health-check round-trip
+HEALTH_CHECK_TIMEOUT = 5.0
+
+# Upper bounds, in seconds, of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _env_list(name: str) -> list[str]:
+    """Read a comma-separated list from an environment variable"""
+    return [item.strip() for item in os.environ.get(name, "").split(",") if item.strip()]
+
+
+def _env_flag(name: str, default: bool = False) -> bool:
+    """Read a boolean environment variable such as 1/0, true/false, yes/no"""
+    value = os.environ.get(name)
+    if value is None or not value.strip():
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# Chromium flags for server use: no GPU compositing or extensions, and no
+# throttling of background tabs, which would stall parallel sessions
+DEFAULT_BROWSER_ARGS = [
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+    "--disable-extensions",
+    "--disable-background-timer-throttling",
+    "--disable-backgrounding-occluded-windows",
+    "--disable-renderer-backgrounding",
+]
+
+
+def _storage_state_path(name: str) -> str:
+    """Map a storage state name to its file in MUDAE_STATE_DIR"""
+    if not name or name in (".", "..") or os.path.basename(name) != name:
+        raise ValueError(f"Invalid storage state name '{name}': use a plain file name")
+    directory = os.path.expanduser(os.environ.get("MUDAE_STATE_DIR", "~/.mudae/storage"))
+    if not name.endswith(".json"):
+        name += ".json"
+    return os.path.join(directory, name)
 
 
 @dataclass
-class AppContext:
-    browser: Browser
+class LaunchOptions:
+    """How to launch Chromium and configure new contexts"""
+
+    headless: bool = True
+    args: list[str] = field(default_factory=lambda: list(DEFAULT_BROWSER_ARGS))
+    viewport: tuple[int, int] | None = None
+    device_scale_factor: float | None = None
+    # Saved storage state file that every new session starts from
+    storage_state: str | None = None
+
+    @classmethod
+    def from_env(cls) -> LaunchOptions:
+        viewport = None
+        if os.environ.get("MUDAE_VIEWPORT"):
+            width, height = os.environ["MUDAE_VIEWPORT"].lower().split("x")
+            viewport = (int(width), int(height))
+        scale = os.environ.get("MUDAE_DEVICE_SCALE_FACTOR")
+        state = os.environ.get("MUDAE_STORAGE_STATE")
+        return cls(
+            headless=_env_flag("MUDAE_HEADLESS", default=True),
+            args=DEFAULT_BROWSER_ARGS + shlex.split(os.environ.get("MUDAE_BROWSER_ARGS", "")),
+            viewport=viewport,
+            device_scale_factor=float(scale) if scale else None,
+            storage_state=_storage_state_path(state) if state else None,
+        )
+
+    def context_options(self) -> dict:
+        """Keyword arguments for browser.new_context()"""
+        options = {}
+        if self.viewport is not None:
+            options["viewport"] = {"width": self.viewport[0], "height": self.viewport[1]}
+        if self.device_scale_factor is not None:
+            options["device_scale_factor"] = self.device_scale_factor
+        if self.storage_state is not None:
+            options["storage_state"] = self.storage_state
+        return options
+
+
+@dataclass
+class ResourceBlocking:
+    """Route-based request blocking rules and counters for one session's context"""
+
+    resource_types: set[str] = field(default_factory=set)
+    url_globs: list[str] = field(default_factory=list)
+    domains: list[str] = field(default_factory=list)
+    enabled: bool = True
+    # Set by navigate for the duration of a single call
+    override: bool | None = None
+    blocked: Counter = field(default_factory=Counter)
+    installed: bool = False
+
+    @classmethod
+    def from_env(cls) -> ResourceBlocking:
+        return cls(
+            resource_types=set(_env_list("MUDAE_BLOCK_RESOURCES")),
+            url_globs=_env_list("MUDAE_BLOCK_URLS"),
+            domains=[domain.lower() for domain in _env_list("MUDAE_BLOCK_DOMAINS")],
+        )
+
+    @property
+    def has_rules(self) -> bool:
+        return bool(self.resource_types or self.url_globs or self.domains)
+
+    @property
+    def active(self) -> bool:
+        return self.enabled if self.override is None else self.override
+
+    def matches(self, request: Request) -> bool:
+        if request.resource_type in self.resource_types:
+            return True
+        url = request.url
+        if any(fnmatch.fnmatchcase(url, glob) for glob in self.url_globs):
+            return True
+        if self.domains:
+            host = (urlsplit(url).hostname or "").lower()
+            return any(host == d or host.endswith("." + d) for d in self.domains)
+        return False
+
+    def status(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "resource_types": sorted(self.resource_types),
+            "url_globs": self.url_globs,
+            "domains": self.domains,
+            "blocked_total": sum(self.blocked.values()),
+            "blocked_by_type": dict(self.blocked),
+        }
+
+
+# Responses with these statuses may be stored (RFC 9111 heuristically cacheable ones)
+CACHEABLE_STATUSES = frozenset({200, 203, 204, 300, 301, 308, 404, 405, 410, 414, 501})
+
+# Headers about the transfer rather than the content. Bodies are stored decoded,
+# so these are recomputed when an entry is served again
+_TRANSFER_HEADERS = frozenset(
+    {"connection", "content-encoding", "content-length", "keep-alive", "transfer-encoding"}
+)
+
+# Upper bound for freshness derived from Last-Modified alone
+HEURISTIC_FRESHNESS_CAP = 86400.0
+
+
+def _cache_control(value: str | None) -> dict[str, str | None]:
+    """Parse a Cache-Control header into {directive: argument or None}"""
+    directives = {}
+    for part in (value or "").split(","):
+        name, _, argument = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip('"') if argument else None
+    return directives
+
+
+def _http_date(value: str | None) -> float | None:
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def _freshness(headers: dict[str, str], now: float) -> float | None:
+    """Seconds a response stays fresh, or None if it must not be stored
+
+    The cache is shared by every session, so responses that may be specific to
+    one user (private, or setting cookies) are never stored.
+    """
+    directives = _cache_control(headers.get("cache-control"))
+    if "no-store" in directives or "private" in directives or "set-cookie" in headers:
+        return None
+    vary = {v.strip() for v in headers.get("vary", "").lower().split(",")} - {"", "accept-encoding"}
+    if vary:
+        return None
+
+    revalidatable = "etag" in headers or "last-modified" in headers
+    date = _http_date(headers.get("date")) or now
+    if "no-cache" in directives:
+        lifetime = 0.0
+    elif directives.get("max-age") is not None:
+        try:
+            lifetime = float(directives["max-age"])
+        except ValueError:
+            lifetime = 0.0
+    elif "expires" in headers:
+        expires = _http_date(headers["expires"])
+        lifetime = expires - date if expires is not None else 0.0
+    elif "last-modified" in headers:
+        modified = _http_date(headers["last-modified"])
+        lifetime = min(0.1 * (date - modified), HEURISTIC_FRESHNESS_CAP) if modified else 0.0
+    else:
+        lifetime = 0.0
+
+    try:
+        age = float(headers.get("age", 0))
+    except ValueError:
+        age = 0.0
+    lifetime = max(0.0, lifetime - age)
+    if lifetime <= 0 and not revalidatable:
+        return None
+    return lifetime
+
+
+@dataclass
+class CachedResponse:
+    """Metadata for one cached response; the body lives in its own file"""
+
+    url: str
+    status: int
+    headers: dict[str, str]
+    size: int
+    # When the response was fetched or last revalidated, and for how long it is fresh
+    stored: float
+    lifetime: float
+
+    def fresh(self, now: float) -> bool:
+        return now - self.stored < self.lifetime
+
+    def validators(self) -> dict[str, str]:
+        """Conditional request headers for revalidating this entry"""
+        conditions = {}
+        if "etag" in self.headers:
+            conditions["if-none-match"] = self.headers["etag"]
+        if "last-modified" in self.headers:
+            conditions["if-modified-since"] = self.headers["last-modified"]
+        return conditions
+
+
+class HttpCache:
+    """Disk-backed HTTP response cache shared by all sessions, with LRU eviction
+
+    Each entry is a <sha256 of url>.json metadata file next to a .body file.
+    Recency is kept in the metadata file's mtime, so LRU order survives
+    restarts.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.entries: OrderedDict[str, CachedResponse] = OrderedDict()
+        self.total = 0
+        # URLs whose files are being written
+        self._storing: set[str] = set()
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    @classmethod
+    def from_env(cls) -> HttpCache | None:
+        if not _env_flag("MUDAE_HTTP_CACHE"):
+            return None
+        directory = os.path.expanduser(
+            os.environ.get("MUDAE_HTTP_CACHE_DIR", "~/.mudae/http-cache")
+        )
+        max_mb = float(os.environ.get("MUDAE_HTTP_CACHE_MB", "256"))
+        return cls(directory, int(max_mb * 1024 * 1024))
+
+    def _path(self, url: str, suffix: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(url.encode()).hexdigest() + suffix)
+
+    def _load(self) -> None:
+        found = []
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".json"):
+                continue
+            try:
+                with open(entry.path, "rb") as f:
+                    cached = CachedResponse(**json.load(f))
+                found.append((entry.stat().st_mtime, cached))
+            except (OSError, ValueError, TypeError):
+                continue
+        for _, cached in sorted(found, key=lambda item: item[0]):
+            self.entries[cached.url] = cached
+            self.total += cached.size
+        self._evict()
+
+    def lookup(self, url: str) -> CachedResponse | None:
+        cached = self.entries.get(url)
+        if cached is not None:
+            self.entries.move_to_end(url)
+            try:
+                os.utime(self._path(url, ".json"))
+            except OSError:
+                pass
+        return cached
+
+    async def read_body(self, cached: CachedResponse) -> bytes | None:
+        try:
+            return await asyncio.to_thread(_read_file, self._path(cached.url, ".body"))
+        except OSError:
+            self._drop(cached.url)
+            return None
+
+    async def store(self, url: str, status: int, headers: dict[str, str], body: bytes) -> None:
+        """Store a response if its status and headers allow it
+
+        Caching is best-effort: a response that cannot be written is not stored.
+        """
+        now = time.time()
+        lifetime = _freshness(headers, now)
+        # A single response may not take more than an eighth of the cache
+        if status not in CACHEABLE_STATUSES or lifetime is None or len(body) > self.max_bytes // 8:
+            return
+        cached = CachedResponse(
+            url=url,
+            status=status,
+            headers={k: v for k, v in headers.items() if k not in _TRANSFER_HEADERS},
+            size=len(body),
+            stored=now,
+            lifetime=lifetime,
+        )
+        # Concurrent fetches of one URL would interleave their file writes;
+        # the first response is as fresh as the others, so only it is stored
+        if url in self._storing:
+            return
+        self._storing.add(url)
+        try:
+            self._drop(url)
+            await asyncio.to_thread(self._write, cached, body)
+        except OSError as e:
+            print(f"HTTP cache: could not store {url}: {e}", file=sys.stderr)
+            # Remove whatever part of the entry was written
+            self._drop(url)
+            return
+        finally:
+            self._storing.discard(url)
+        previous = self.entries.pop(url, None)
+        if previous is not None:
+            self.total -= previous.size
+        self.entries[url] = cached
+        self.total += cached.size
+        self._evict()
+
+    async def revalidated(self, cached: CachedResponse, headers: dict[str, str]) -> None:
+        """Refresh an entry's freshness from a 304 Not Modified response"""
+        merged = {**cached.headers, **{k: v for k, v in headers.items() if k not in _TRANSFER_HEADERS}}
+        now = time.time()
+        lifetime = _freshness(merged, now)
+        if self.entries.get(cached.url) is not cached or cached.url in self._storing:
+            # Replaced while the request was in flight
+            return
+        if lifetime is None:
+            self._drop(cached.url)
+            return
+        cached.headers, cached.stored, cached.lifetime = merged, now, lifetime
+        self._storing.add(cached.url)
+        try:
+            await asyncio.to_thread(self._write_metadata, cached)
+        except OSError:
+            self._drop(cached.url)
+        finally:
+            self._storing.discard(cached.url)
+
+    def _write(self, cached: CachedResponse, body: bytes) -> None:
+        with open(self._path(cached.url, ".body"), "wb") as f:
+            f.write(body)
+        # Metadata last, so a crash never leaves metadata without a body
+        self._write_metadata(cached)
+
+    def _write_metadata(self, cached: CachedResponse) -> None:
+        with open(self._path(cached.url, ".json"), "wb") as f:
+            f.write(to_json(cached))
+
+    def _drop(self, url: str) -> None:
+        cached = self.entries.pop(url, None)
+        if cached is not None:
+            self.total -= cached.size
+        for suffix in (".json", ".body"):
+            try:
+                os.remove(self._path(url, suffix))
+            except OSError:
+                pass
+
+    def _evict(self) -> None:
+        while self.total > self.max_bytes and self.entries:
+            self._drop(next(iter(self.entries)))
+            metrics.event("http_cache_evicted")
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+@functools.cache
+def _shared_http_cache() -> HttpCache | None:
+    """The process-wide HTTP cache, or None when MUDAE_HTTP_CACHE is off"""
+    return HttpCache.from_env()
+
+
+@dataclass
+class Histogram:
+    """Latency histogram over LATENCY_BUCKETS, plus an overflow bucket"""
+
+    counts: list[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    def observe(self, seconds: float) -> None:
+        index = 0
+        while index < len(LATENCY_BUCKETS) and seconds > LATENCY_BUCKETS[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q: float) -> float | None:
+        """Estimate a quantile by interpolating within its bucket"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = LATENCY_BUCKETS[index - 1] if index else 0.0
+                upper = LATENCY_BUCKETS[index] if index < len(LATENCY_BUCKETS) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / bucket_count, self.max)
+            seen += bucket_count
+        return self.max
+
+    def summary(self) -> dict:
+        def ms(seconds: float | None) -> float | None:
+            return None if seconds is None else round(seconds * 1000, 3)
+
+        return {
+            "count": self.count,
+            "mean_ms": ms(self.total / self.count if self.count else None),
+            "p50_ms": ms(self.quantile(0.5)),
+            "p95_ms": ms(self.quantile(0.95)),
+            "max_ms": ms(self.max),
+        }
+
+
+@dataclass
+class ToolStats:
+    """Counters for one tool and action/type"""
+
+    calls: int = 0
+    errors: int = 0
+    latency: Histogram = field(default_factory=Histogram)
+    response_bytes: int = 0
+    max_response_bytes: int = 0
+
+
+class Metrics:
+    """Per-tool call, error, latency and payload counters, plus timed internal phases
+
+    Phases separate where a call spends its time: browser round-trips, Python
+    filtering and serialization.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.tools: dict[tuple[str, str], ToolStats] = {}
+        self.phases: dict[str, Histogram] = {}
+        self.events: Counter = Counter()
+
+    def record(self, tool: str, label: str, seconds: float, size: int, error: bool) -> None:
+        stats = self.tools.get((tool, label))
+        if stats is None:
+            stats = self.tools[tool, label] = ToolStats()
+        stats.calls += 1
+        stats.errors += error
+        stats.latency.observe(seconds)
+        stats.response_bytes += size
+        stats.max_response_bytes = max(stats.max_response_bytes, size)
+
+    @contextmanager
+    def timer(self, phase: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            histogram = self.phases.get(phase)
+            if histogram is None:
+                histogram = self.phases[phase] = Histogram()
+            histogram.observe(time.perf_counter() - started)
+
+    def event(self, name: str) -> None:
+        self.events[name] += 1
+
+    def reset(self) -> None:
+        self.__init__()
+
+    def snapshot(self) -> dict:
+        tools = []
+        for (tool, label), stats in sorted(self.tools.items()):
+            tools.append({
+                "tool": tool,
+                "label": label,
+                "calls": stats.calls,
+                "errors": stats.errors,
+                "latency": stats.latency.summary(),
+                "response_bytes_total": stats.response_bytes,
+                "response_bytes_mean": stats.response_bytes // stats.calls,
+                "response_bytes_max": stats.max_response_bytes,
+            })
+        return {
+            "uptime_s": round(time.time() - self.started, 1),
+            "tools": tools,
+            "phases": {name: h.summary() for name, h in sorted(self.phases.items())},
+            "events": dict(self.events),
+        }
+
+    def prometheus(self) -> str:
+        """Render every counter in the Prometheus text exposition format"""
+        lines = []
+
+        def histogram_lines(metric: str, labels: str, histogram: Histogram) -> None:
+            cumulative = 0
+            for bound, bucket_count in zip(LATENCY_BUCKETS, histogram.counts):
+                cumulative += bucket_count
+                lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f"{metric}_sum{{{labels}}} {histogram.total}")
+            lines.append(f"{metric}_count{{{labels}}} {histogram.count}")
+
+        def label_value(value: str) -> str:
+            return value.replace("\\", "\\\\").replace('"', '\\"')
+
+        tools = sorted(self.tools.items())
+        lines.append("# TYPE mudae_tool_calls_total counter")
+        for (tool, label), stats in tools:
+            lines.append(f'mudae_tool_calls_total{{tool="{tool}",label="{label_value(label)}"}} {stats.calls}')
+        lines.append("# TYPE mudae_tool_errors_total counter")
+        for (tool, label), stats in tools:
+            lines.append(f'mudae_tool_errors_total{{tool="{tool}",label="{label_value(label)}"}} {stats.errors}')
+        lines.append("# TYPE mudae_tool_response_bytes_total counter")
+        for (tool, label), stats in tools:
+            lines.append(
+                f'mudae_tool_response_bytes_total{{tool="{tool}",label="{label_value(label)}"}} {stats.response_bytes}'
+            )
+        lines.append("# TYPE mudae_tool_latency_seconds histogram")
+        for (tool, label), stats in tools:
+            histogram_lines(
+                "mudae_tool_latency_seconds",
+                f'tool="{tool}",label="{label_value(label)}"',
+                stats.latency,
+            )
+        lines.append("# TYPE mudae_phase_seconds histogram")
+        for phase, histogram in sorted(self.phases.items()):
+            histogram_lines("mudae_phase_seconds", f'phase="{phase}"', histogram)
+        lines.append("# TYPE mudae_events_total counter")
+        for name, count in sorted(self.events.items()):
+            lines.append(f'mudae_events_total{{event="{label_value(name)}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide, so every tool wrapper and background task records into one place
+metrics = Metrics()
+
+
+@dataclass
+class ElementRef:
+    """An interactive element from a snapshot: the nth element with this role and name"""
+
+    role: str
+    name: str | None
+    nth: int
+    handle: ElementHandle | None = None
+    # dom_epoch the handle was resolved at; it is reused only while still current
+    epoch: int = -1
+
+
+@dataclass
+class Session:
+    """A browser context and page owned by a single session id"""
+
     context: BrowserContext
     page: Page
+    last_used: float = field(default_factory=time.monotonic)
+    active: int = 0
+    # Flattened accessibility tree from the last full/diff snapshot, for accessibility_diff
+    last_accessibility: dict[str, dict] | None = None
+    # Bumped on DOM mutations, input events, navigations and page actions; cached
+    # snapshots are only served while the epoch they were computed at is current
+    dom_epoch: int = 0
+    tracks_mutations: bool = False
+    snapshot_cache: dict[tuple, tuple[int, str]] = field(default_factory=dict)
+    cdp: CDPSession | None = None
+    blocking: ResourceBlocking = field(default_factory=ResourceBlocking.from_env)
+    # Element refs handed out in snapshots, reset when the main frame navigates.
+    # Ids keep counting up so a ref from an old page never names a new element
+    refs: dict[str, ElementRef] = field(default_factory=dict)
+    ref_ids: dict[tuple[str, str | None, int], str] = field(default_factory=dict)
+    next_ref: int = 1
+    # The browser process this session's context lives in, and which start of it
+    browser: BrowserManager | None = None
+    generation: int = 0
+    # Last main-frame URL, reopened if the page or browser has to be recovered
+    last_url: str | None = None
+    crashed: bool = False
+    # Storage state file the context was created from, reused on recovery
+    storage_state: str | None = None
+    # Responses served from the HTTP cache, and a per-call bypass set by navigate
+    cache_hits: int = 0
+    cache_refresh: bool = False
+
+    async def cdp_session(self) -> CDPSession:
+        """Return a CDP session attached to this session's page, created on first use"""
+        if self.cdp is None:
+            self.cdp = await self.context.new_cdp_session(self.page)
+        return self.cdp
+
+    def invalidate(self) -> None:
+        self.dom_epoch += 1
+        self.snapshot_cache.clear()
+
+    def cached_snapshot(self, key: tuple) -> str | None:
+        if not self.tracks_mutations:
+            return None
+        entry = self.snapshot_cache.get(key)
+        if entry is None or entry[0] != self.dom_epoch:
+            return None
+        return entry[1]
+
+    def store_snapshot(self, key: tuple, epoch: int, result: str) -> None:
+        # Results computed while the DOM changed underneath are never stored
+        if self.tracks_mutations and epoch == self.dom_epoch:
+            self.snapshot_cache[key] = (epoch, result)
+
+    def needs_recovery(self) -> bool:
+        """Whether the page crashed or closed, or its browser died or was replaced"""
+        if self.crashed or self.page.is_closed():
+            return True
+        manager = self.browser
+        return manager is not None and (
+            not manager.connected or manager.generation != self.generation
+        )
 
+    def ref_for(self, role: str, name: str | None, nth: int) -> str:
+        """Return the ref for an element, reusing the one already issued on this page"""
+        key = (role, name, nth)
+        ref = self.ref_ids.get(key)
+        if ref is None:
+            ref = f"e{self.next_ref}"
+            self.next_ref += 1
+            self.ref_ids[key] = ref
+            self.refs[ref] = ElementRef(role, name, nth)
+        return ref
+
+    def reset_refs(self) -> None:
+        self.refs.clear()
+        self.ref_ids.clear()
+
+    async def resolve_ref(self, ref: str) -> ElementHandle | None:
+        """Return the element for a known ref, or None if it is no longer on the page"""
+        from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+        entry = self.refs[ref]
+        if (
+            entry.handle is not None
+            and self.tracks_mutations
+            and entry.epoch == self.dom_epoch
+        ):
+            return entry.handle
+        if entry.name:
+            locator = self.page.get_by_role(entry.role, name=entry.name, exact=True)
+        else:
+            locator = self.page.get_by_role(entry.role)
+        epoch = self.dom_epoch
+        try:
+            handle = await locator.nth(entry.nth).element_handle(timeout=REF_TIMEOUT_MS)
+        except PlaywrightTimeoutError:
+            handle = None
+        entry.handle, entry.epoch = handle, epoch
+        return handle
+
+
+# Notifies Python (at most once per microtask) whenever the DOM mutates or the
+# user changes form state, which does not show up as a DOM mutation
+_DOM_EPOCH_SCRIPT = """
+(() => {
+  if (window.__mudaeEpochInstalled) return;
+  window.__mudaeEpochInstalled = true;
+  let pending = false;
+  const notify = () => {
+    if (pending) return;
+    pending = true;
+    queueMicrotask(() => {
+      pending = false;
+      if (window.__mudaeDomChanged) window.__mudaeDomChanged();
+    });
+  };
+  new MutationObserver(notify).observe(document, {
+    subtree: true, childList: true, attributes: true, characterData: true,
+  });
+  for (const type of ["input", "change", "focusin", "focusout"]) {
+    window.addEventListener(type, notify, true);
+  }
+})()
+"""
 
-@asynccontextmanager
-async def app_lifespan(server: FastMCP) -> AsyncIterator[AppContext]:
-    """Manage browser lifecycle"""
-    # Initialize browser on startup
-    playwright = await async_playwright().start()
-    browser = None
 
-    # Check for CDP URL in environment
-    cdp_url = os.environ.get("LOCAL_CDP_URL", "http://localhost:9222")
+async def _install_resource_blocking(session: Session) -> None:
+    """Route the session's context through its blocking rules (once per context)"""
+    blocking = session.blocking
+    if blocking.installed:
+        return
+
+    async def handle(route: Route) -> None:
+        request = route.request
+        if blocking.active and blocking.matches(request):
+            blocking.blocked[request.resource_type] += 1
+            await route.abort("blockedbyclient")
+        else:
+            # Let any other route handlers on the context see the request
+            await route.fallback()
+
+    await session.context.route("**/*", handle)
+    blocking.installed = True
+
+
+async def _install_http_cache(session: Session, cache: HttpCache) -> None:
+    """Serve the session's GET requests from the shared HTTP cache when fresh
+
+    Stale entries are revalidated with their ETag/Last-Modified. Redirects
+    are stored and served as they are, and the browser follows them. Requests
+    that the session's blocking rules match go on to the blocking handler,
+    whatever order the two were routed in.
+    """
+
+    async def handle(route: Route) -> None:
+        request = route.request
+        blocking = session.blocking
+        if request.method != "GET" or (blocking.active and blocking.matches(request)):
+            await route.fallback()
+            return
+        headers = await request.all_headers()
+        # The cache is shared by every session, so requests carrying
+        # credentials are never answered from it
+        if "authorization" in headers or "cookie" in headers or "range" in headers:
+            await route.fallback()
+            return
+
+        cached = None if session.cache_refresh else cache.lookup(request.url)
+        request_directives = _cache_control(headers.get("cache-control"))
+        # A reload sends max-age=0, so the entry is revalidated as with no-cache
+        try:
+            max_age = float(request_directives.get("max-age") or "inf")
+        except ValueError:
+            max_age = float("inf")
+        must_revalidate = (
+            "no-cache" in request_directives
+            or headers.get("pragma") == "no-cache"
+            or (cached is not None and time.time() - cached.stored >= max_age)
+        )
+        if cached is not None and cached.fresh(time.time()) and not must_revalidate:
+            body = await cache.read_body(cached)
+            if body is not None:
+                session.cache_hits += 1
+                metrics.event("http_cache_hit")
+                await route.fulfill(status=cached.status, headers=cached.headers, body=body)
+                return
+            cached = None
+
+        conditions = cached.validators() if cached is not None else {}
+        try:
+            response = await route.fetch(
+                headers={**headers, **conditions} if conditions else None, max_redirects=0
+            )
+        except Exception:
+            # Let the browser load it, and report the failure, as usual
+            await route.fallback()
+            return
+
+        if response.status == 304 and cached is not None:
+            body = await cache.read_body(cached)
+            if body is not None:
+                await cache.revalidated(cached, response.headers)
+                session.cache_hits += 1
+                metrics.event("http_cache_revalidated")
+                await route.fulfill(status=cached.status, headers=cached.headers, body=body)
+                return
+            # The cached body is gone, so the 304 is useless; fetch it in full
+            try:
+                response = await route.fetch(max_redirects=0)
+            except Exception:
+                await route.fallback()
+                return
+
+        body = await response.body()
+        metrics.event("http_cache_miss")
+        await cache.store(request.url, response.status, response.headers, body)
+        await route.fulfill(response=response, body=body)
+
+    await session.context.route("**/*", handle)
+
+
+async def _track_dom_epoch(session: Session) -> None:
+    """Install the mutation observer and navigation hook that drive session.dom_epoch"""
+    page = session.page
 
     try:
-        # Try to connect to existing browser via CDP
-        browser = await playwright.chromium.connect_over_cdp(cdp_url)
-        print(f"Connected to existing browser at {cdp_url}")
+        await page.expose_function("__mudaeDomChanged", session.invalidate)
+        await page.add_init_script(_DOM_EPOCH_SCRIPT)
+        await page.evaluate(_DOM_EPOCH_SCRIPT)
     except Exception as e:
-        print(f"Failed to connect to CDP at {cdp_url}: {e}")
-        # Fall back to launching new browser
-        browser = await playwright.chromium.launch(
-            headless=False,  # Set to True for headless mode
-            args=["--no-sandbox", "--disable-dev-shm-usage"],
+        # Without change notifications the cache could serve stale results
+        print(f"DOM epoch tracking unavailable, snapshot cache disabled: {e}", file=sys.stderr)
+        return
+    page.on("framenavigated", lambda _: session.invalidate())
+    session.tracks_mutations = True
+
+
+def _track_navigation(session: Session) -> None:
+    """Follow main-frame navigations and crashes of the session's page
+
+    Navigations forget element refs and remember the URL to restore on
+    recovery; a crash marks the session for recovery on its next use.
+    """
+    page = session.page
+
+    def on_navigated(frame) -> None:
+        if frame == page.main_frame:
+            session.reset_refs()
+            if frame.url != "about:blank":
+                session.last_url = frame.url
+
+    def on_crash(_) -> None:
+        session.crashed = True
+        metrics.event("page_crashed")
+        print(f"Page crashed at {session.last_url}", file=sys.stderr)
+
+    page.on("framenavigated", on_navigated)
+    page.on("crash", on_crash)
+
+
+async def _restore_url(session: Session, url: str) -> None:
+    """Reopen a recovered session's last URL; on failure it stays on a blank page"""
+    try:
+        await session.page.goto(
+            url, wait_until="domcontentloaded", timeout=DEFAULT_NAVIGATION_TIMEOUT_MS
         )
-        print("Launched new browser instance")
+    except Exception as e:
+        print(f"Could not restore {url} after recovery: {e}", file=sys.stderr)
+
+
+class BrowserManager:
+    """Start Playwright and one browser process lazily, on first use
+
+    With a CDP endpoint the manager attaches to that browser, falling back to
+    launching one; without an endpoint it always launches its own.
+    """
+
+    def __init__(self, cdp_url: str | None, options: LaunchOptions, name: str = "browser-0"):
+        self.cdp_url = cdp_url
+        self.options = options
+        self.name = name
+        self.playwright: Playwright | None = None
+        self.browser: Browser | None = None
+        # Number of sessions placed on this browser
+        self.sessions = 0
+        # Bumped on every (re)start, so sessions can tell their context is gone
+        self.generation = 0
+        self._probe: CDPSession | None = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def connected(self) -> bool:
+        return self.browser is not None and self.browser.is_connected()
+
+    async def get(self) -> Browser:
+        """Return the browser, connecting or launching it if not started or disconnected"""
+        if not self.connected:
+            await self.start()
+        return self.browser
+
+    def _on_disconnected(self, _) -> None:
+        metrics.event("browser_disconnected")
+        print(f"{self.name}: browser disconnected", file=sys.stderr)
+
+    async def start(self) -> None:
+        async with self._lock:
+            if self.connected:
+                return
+            if self.browser is not None:
+                # The browser died; drop what is left before starting over
+                await self._shutdown()
+                metrics.event("browser_restarted")
+
+            from playwright.async_api import async_playwright
+
+            started = time.perf_counter()
+            self.playwright = await async_playwright().start()
+            try:
+                if self.cdp_url:
+                    try:
+                        # Try to connect to existing browser via CDP
+                        self.browser = await self.playwright.chromium.connect_over_cdp(
+                            self.cdp_url
+                        )
+                        print(
+                            f"{self.name}: connected to existing browser at {self.cdp_url}",
+                            file=sys.stderr,
+                        )
+                    except Exception as e:
+                        print(
+                            f"{self.name}: failed to connect to CDP at {self.cdp_url}: {e}",
+                            file=sys.stderr,
+                        )
+                if self.browser is None:
+                    # Fall back to launching new browser
+                    self.browser = await self.playwright.chromium.launch(
+                        headless=self.options.headless, args=self.options.args
+                    )
+                    mode = "headless" if self.options.headless else "headed"
+                    print(f"{self.name}: launched new {mode} browser instance", file=sys.stderr)
+            except BaseException:
+                # Stop the driver too, or every failed start would leave one running
+                await self._shutdown()
+                raise
+            self.browser.on("disconnected", self._on_disconnected)
+            self.generation += 1
+
+            elapsed = time.perf_counter() - started
+            print(f"{self.name}: browser ready in {elapsed:.2f}s", file=sys.stderr)
+
+    async def warm_up(self) -> None:
+        """Start the browser in the background; failures are retried on first use"""
+        try:
+            await self.start()
+        except Exception as e:
+            print(f"{self.name}: browser warm-up failed: {e}", file=sys.stderr)
+
+    async def healthy(self) -> bool:
+        """Whether the browser is connected and answers a CDP round-trip in time
+
+        A browser that was never started counts as healthy.
+        """
+        browser = self.browser
+        if browser is None:
+            return True
+        if not browser.is_connected():
+            return False
+        try:
+            if self._probe is None:
+                self._probe = await browser.new_browser_cdp_session()
+            await asyncio.wait_for(
+                self._probe.send("Browser.getVersion"), HEALTH_CHECK_TIMEOUT
+            )
+            return True
+        except Exception:
+            return False
 
-    context = await browser.new_context()
+    async def close(self) -> None:
+        async with self._lock:
+            await self._shutdown()
+
+    async def _shutdown(self) -> None:
+        self._probe = None
+        if self.browser is not None:
+            try:
+                await self.browser.close()
+            except Exception:
+                # Already gone; there is nothing left to close
+                pass
+            self.browser = None
+        if self.playwright is not None:
+            try:
+                await self.playwright.stop()
+            except Exception:
+                pass
+            self.playwright = None
+
+    async def restart(self) -> None:
+        """Replace a dead or hung browser with a fresh one"""
+        await self.close()
+        await self.start()
+
+
+class BrowserPool:
+    """Several browser processes, with new sessions placed on the least loaded one
+
+    Each CDP endpoint gets its own manager; any further browsers up to size are
+    launched locally. Separate processes keep one crashed, hung or CPU-heavy
+    renderer from stalling every session.
+    """
+
+    def __init__(self, cdp_urls: list[str], options: LaunchOptions, size: int = 1):
+        self.options = options
+        endpoints = list(cdp_urls) + [None] * max(0, size - len(cdp_urls))
+        self.managers = [
+            BrowserManager(url, options, name=f"browser-{index}")
+            for index, url in enumerate(endpoints or [None])
+        ]
+
+    def place(self) -> BrowserManager:
+        """Pick the browser for a new session: fewest sessions, then lowest index"""
+        return min(self.managers, key=lambda manager: manager.sessions)
+
+    async def warm_up(self) -> None:
+        await asyncio.gather(*(manager.warm_up() for manager in self.managers))
+
+    async def close(self) -> None:
+        await asyncio.gather(*(manager.close() for manager in self.managers))
+
+
+async def _open_session(
+    manager: BrowserManager,
+    options: LaunchOptions,
+    blocking: ResourceBlocking | None = None,
+    storage_state: str | None = None,
+) -> Session:
+    """Create a context and page on a browser, with change tracking and blocking installed"""
+    browser = await manager.get()
+    context_options = options.context_options()
+    default_state = context_options.get("storage_state")
+    if default_state is not None and not os.path.exists(default_state):
+        # MUDAE_STORAGE_STATE may name a state that has not been saved yet;
+        # start without it rather than failing every new context
+        print(
+            f"Storage state file {default_state} not found; starting without it",
+            file=sys.stderr,
+        )
+        del context_options["storage_state"]
+    if storage_state is not None:
+        context_options["storage_state"] = storage_state
+    context = await browser.new_context(**context_options)
     page = await context.new_page()
+    session = Session(
+        context=context,
+        page=page,
+        browser=manager,
+        generation=manager.generation,
+        storage_state=context_options.get("storage_state"),
+    )
+    if blocking is not None:
+        session.blocking = blocking
+    await _track_dom_epoch(session)
+    _track_navigation(session)
+    cache = _shared_http_cache()
+    if cache is not None:
+        await _install_http_cache(session, cache)
+    if session.blocking.has_rules:
+        # Only route when there is something to block; every routed
+        # request costs a round-trip through Python
+        await _install_resource_blocking(session)
+    return session
+
+
+class WarmPool:
+    """Blank sessions opened ahead of time, so a new session id starts immediately
+
+    Taking a session schedules a background refill back up to size. Warm
+    sessions are spread over the browsers, favouring the least loaded.
+    """
+
+    def __init__(self, browsers: BrowserPool, size: int):
+        self.browsers = browsers
+        self.size = max(0, size)
+        self.ready: list[Session] = []
+        self._refill: asyncio.Task | None = None
+
+    def take(self, manager: BrowserManager) -> Session | None:
+        """Hand out a usable warm session, preferring one on the given browser"""
+        # Stable sort: the preferred browser's sessions first, otherwise oldest first
+        for session in sorted(self.ready, key=lambda s: s.browser is not manager):
+            self.ready.remove(session)
+            if session.needs_recovery():
+                asyncio.create_task(_close_quietly(session))
+                continue
+            metrics.event("warm_session_used")
+            return session
+        return None
+
+    def refill(self) -> None:
+        if self.size and (self._refill is None or self._refill.done()):
+            self._refill = asyncio.create_task(self._fill())
+
+    async def _fill(self) -> None:
+        managers = self.browsers.managers
+        try:
+            while len(self.ready) < self.size:
+                manager = min(
+                    managers,
+                    key=lambda m: m.sessions + sum(s.browser is m for s in self.ready),
+                )
+                self.ready.append(await _open_session(manager, self.browsers.options))
+        except Exception as e:
+            # Retried on the next take; a failing browser is not hammered meanwhile
+            print(f"Could not prewarm a session: {e}", file=sys.stderr)
+
+    async def close(self) -> None:
+        if self._refill is not None:
+            self._refill.cancel()
+        sessions, self.ready = self.ready, []
+        for session in sessions:
+            await _close_quietly(session)
+
+
+async def _close_quietly(session: Session) -> None:
+    try:
+        await session.context.close()
+    except Exception:
+        pass
+
+
+class SessionPool:
+    """Session-keyed pool of browser contexts with LRU eviction of idle sessions
+
+    Pool bookkeeping never awaits, so it needs no lock: contexts are created,
+    recovered and closed outside it, and concurrent calls for a session that is
+    being built wait on that session's pending future instead of building another.
+    """
+
+    def __init__(self, browsers: BrowserPool, max_sessions: int, warm_sessions: int = 0):
+        self.browsers = browsers
+        self.max_sessions = max(1, max_sessions)
+        self.sessions: OrderedDict[str, Session] = OrderedDict()
+        self.warm = WarmPool(browsers, warm_sessions)
+        # Sessions being created, recovered or reseeded, resolved once they are ready
+        self._pending: dict[str, asyncio.Future] = {}
+
+    async def acquire(self, session_id: str) -> Session:
+        """Return the session for an id, creating it (and evicting if full) as needed
+
+        A session whose page crashed or whose browser died is rebuilt in a fresh
+        context and reopened at its last URL.
+        """
+        while True:
+            pending = self._pending.get(session_id)
+            if pending is not None:
+                await pending
+                continue
+            session = self.sessions.get(session_id)
+            if session is not None and not session.needs_recovery():
+                self.sessions.move_to_end(session_id)
+                session.active += 1
+                session.last_used = time.monotonic()
+                return session
+            break
+
+        victims = [] if session is not None else self._make_room()
+        pending = self._begin(session_id)
+        try:
+            for victim in victims:
+                asyncio.create_task(_close_quietly(victim))
+            if session is not None:
+                restore_url = session.last_url
+                session = await self._recover(session_id, session)
+            else:
+                restore_url = None
+                session = await self._create(session_id)
+            session.active += 1
+            if restore_url:
+                await _restore_url(session, restore_url)
+        finally:
+            self._finish(session_id, pending)
+        return session
+
+    def _begin(self, session_id: str) -> asyncio.Future:
+        pending = asyncio.get_running_loop().create_future()
+        self._pending[session_id] = pending
+        return pending
+
+    def _finish(self, session_id: str, pending: asyncio.Future) -> None:
+        # Waiters re-check the pool, so a failed build lets them try again
+        del self._pending[session_id]
+        pending.set_result(None)
+
+    async def _create(
+        self,
+        session_id: str,
+        blocking: ResourceBlocking | None = None,
+        storage_state: str | None = None,
+    ) -> Session:
+        manager = self.browsers.place()
+        # Warm sessions carry the default blocking rules and storage state, so
+        # sessions with their own build a fresh context
+        session = None
+        if blocking is None and storage_state is None:
+            session = self.warm.take(manager)
+        if session is None:
+            session = await _open_session(
+                manager, self.browsers.options, blocking, storage_state
+            )
+        session.last_used = time.monotonic()
+        session.browser.sessions += 1
+        self.sessions[session_id] = session
+        self.sessions.move_to_end(session_id)
+        self.warm.refill()
+        return session
+
+    async def _recover(self, session_id: str, session: Session) -> Session:
+        """Replace a broken session with a new one that keeps its blocking rules"""
+        self._remove(session_id)
+        # The browser may already be gone along with the context, so closing
+        # it is not waited on
+        asyncio.create_task(_close_quietly(session))
+        blocking = replace(session.blocking, installed=False, override=None)
+        recovered = await self._create(session_id, blocking, session.storage_state)
+        metrics.event("session_recovered")
+        print(
+            f"Recovered session '{session_id}' (last URL: {session.last_url})",
+            file=sys.stderr,
+        )
+        return recovered
+
+    def release(self, session: Session) -> None:
+        session.active -= 1
+        session.last_used = time.monotonic()
+
+    async def reseed(self, session_id: str, storage_state: str) -> Session:
+        """Replace a session with one whose context starts from a saved storage state
+
+        The new context keeps the old session's blocking rules. Sessions in use
+        by another call are not replaced.
+        """
+        while (pending := self._pending.get(session_id)) is not None:
+            await pending
+        old = self.sessions.get(session_id)
+        if old is not None and old.active:
+            raise RuntimeError(f"Session '{session_id}' is busy")
+        blocking = None
+        victims = []
+        if old is not None:
+            self._remove(session_id)
+            blocking = replace(old.blocking, installed=False, override=None)
+        else:
+            victims = self._make_room()
+        pending = self._begin(session_id)
+        try:
+            for victim in victims:
+                asyncio.create_task(_close_quietly(victim))
+            session = await self._create(session_id, blocking, storage_state)
+        finally:
+            self._finish(session_id, pending)
+        if old is not None:
+            await _close_quietly(old)
+        return session
+
+    def _remove(self, session_id: str) -> Session | None:
+        session = self.sessions.pop(session_id, None)
+        if session is not None and session.browser is not None:
+            session.browser.sessions -= 1
+        return session
+
+    async def close(self, session_id: str) -> bool:
+        """Close a session's context; returns False if the session does not exist"""
+        session = self._remove(session_id)
+        if session is None:
+            return False
+        await session.context.close()
+        return True
+
+    async def close_all(self) -> None:
+        sessions = [self._remove(sid) for sid in list(self.sessions)]
+        await self.warm.close()
+        for session in sessions:
+            await _close_quietly(session)
+
+    def _make_room(self) -> list[Session]:
+        """Remove idle sessions until a new one fits; the caller closes them"""
+        # Sessions being built for new ids take a slot before they are in the pool
+        building = sum(1 for sid in self._pending if sid not in self.sessions)
+        victims = []
+        # Sessions are kept in LRU order, so the first idle one is the eviction victim
+        while len(self.sessions) + building >= self.max_sessions:
+            victim = next(
+                (sid for sid, s in self.sessions.items() if s.active == 0), None
+            )
+            if victim is None:
+                raise RuntimeError(
+                    f"Session pool is full: all {self.max_sessions} sessions are busy"
+                )
+            victims.append(self._remove(victim))
+            print(f"Evicted idle session '{victim}'", file=sys.stderr)
+        return victims
+
+
+async def _monitor_browsers(browsers: BrowserPool, interval: float) -> None:
+    """Health-check every browser periodically and replace the ones that fail
+
+    Sessions on a replaced browser are recovered on their next use.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        for manager in browsers.managers:
+            if await manager.healthy():
+                continue
+            metrics.event("browser_replaced")
+            print(f"{manager.name}: health check failed, replacing it", file=sys.stderr)
+            try:
+                await manager.restart()
+            except Exception as e:
+                # The next session placed here retries the start
+                print(f"{manager.name}: replacement failed: {e}", file=sys.stderr)
+
 
+async def _serve_metrics(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """Answer GET /metrics with the Prometheus text format; anything else is a 404"""
     try:
-        yield AppContext(browser=browser, context=context, page=page)
+        request_line = await reader.readline()
+        # Drain the headers; the request has no body
+        while (await reader.readline()).strip():
+            pass
+        parts = request_line.decode("latin-1").split()
+        if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+            status, body = "200 OK", metrics.prometheus().encode()
+        else:
+            status, body = "404 Not Found", b"not found\n"
+        writer.write(
+            f"HTTP/1.1 {status}\r\n"
+            "Content-Type: text/plain; version=0.0.4\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n".encode()
+            + body
+        )
+        await writer.drain()
+    except Exception as e:
+        print(f"Metrics request failed: {e}", file=sys.stderr)
+    finally:
+        writer.close()
+
+
+@dataclass
+class AppContext:
+    browsers: BrowserPool
+    pool: SessionPool
+
+
+@asynccontextmanager
+async def app_lifespan(server: FastMCP) -> AsyncIterator[AppContext]:
+    """Manage browser lifecycle"""
+    # The browser is started lazily on the first tool call that needs a page,
+    # so the server can answer initialize/list_tools immediately
+    cdp_urls = _env_list("LOCAL_CDP_URL") or ["http://localhost:9222"]
+    size = int(os.environ.get("MUDAE_BROWSERS", "1"))
+    browsers = BrowserPool(cdp_urls, LaunchOptions.from_env(), size)
+
+    max_sessions = int(os.environ.get("MUDAE_MAX_SESSIONS", "8"))
+    warm_sessions = int(os.environ.get("MUDAE_WARM_SESSIONS", "0"))
+    pool = SessionPool(browsers, max_sessions, warm_sessions)
+    # Opening the warm sessions starts the browsers too
+    pool.warm.refill()
+
+    warm_up = None
+    if _env_flag("MUDAE_WARMUP"):
+        warm_up = asyncio.create_task(browsers.warm_up())
+
+    metrics_server = None
+    if os.environ.get("MUDAE_METRICS_PORT"):
+        # Prometheus scrape endpoint; stdout belongs to the MCP transport
+        host = os.environ.get("MUDAE_METRICS_HOST", "127.0.0.1")
+        port = int(os.environ["MUDAE_METRICS_PORT"])
+        metrics_server = await asyncio.start_server(_serve_metrics, host, port)
+        print(f"Serving metrics at http://{host}:{port}/metrics", file=sys.stderr)
+
+    monitor = None
+    health_interval = float(os.environ.get("MUDAE_HEALTH_INTERVAL", "10"))
+    if health_interval > 0:
+        monitor = asyncio.create_task(_monitor_browsers(browsers, health_interval))
+
+    try:
+        yield AppContext(browsers=browsers, pool=pool)
     finally:
         # Cleanup on shutdown
-        await context.close()
-        await browser.close()
-        await playwright.stop()
+        if warm_up is not None and not warm_up.done():
+            warm_up.cancel()
+        if monitor is not None:
+            monitor.cancel()
+        if metrics_server is not None:
+            metrics_server.close()
+        await pool.close_all()
+        await browsers.close()
 
 
 mcp = FastMCP(
@@ -79,14 +1447,139 @@ mcp = FastMCP(
 )
 
 
-class ElementActionInput(BaseModel):
-    type: Literal["className", "id", "text"] = Field(
-        ...,
-        description="How to select the element - 'className' for CSS class names, 'id' for element IDs, 'text' for visible text content",
+OutputFormat = Literal["pretty", "compact", "text"]
+
+
+class SessionInput(BaseModel):
+    session_id: str = Field(
+        DEFAULT_SESSION_ID,
+        description="Browser session to use. Each session id gets its own isolated context and tab; omit to use the shared default session",
     )
-    selector: str = Field(
-        ...,
-        description="The selector value: class name (without dot), element ID (without hash), or exact visible text content",
+    output_format: OutputFormat | None = Field(
+        None,
+        description="Format of JSON results: 'pretty' (indented JSON), 'compact' (JSON without whitespace) or 'text' (terse indented lines, best for accessibility trees). Defaults to the server setting",
+    )
+
+
+def _format_scalar(value) -> str:
+    if isinstance(value, str) and value and not any(c.isspace() or c in '"=:' for c in value):
+        return value
+    return to_json(value, fallback=str).decode()
+
+
+def _is_scalar(value) -> bool:
+    return not isinstance(value, (dict, list)) or not value
+
+
+def _render_text(payload) -> str:
+    """Render a result as terse indented lines; accessibility nodes become one line each"""
+    lines = []
+    # (indent, prefix, value) in output order; iterative so deep trees cannot hit the recursion limit
+    stack = [(0, "", payload)]
+    while stack:
+        indent, prefix, value = stack.pop()
+        pad = " " * indent
+
+        if _is_scalar(value):
+            lines.append(f"{pad}{prefix}{_format_scalar(value)}")
+
+        elif isinstance(value, dict) and "role" in value and all(
+            key == "children" or _is_scalar(item) for key, item in value.items()
+        ):
+            # Accessibility-style node: role "name" key=value ..., children nested below.
+            # Dicts with other nested fields (e.g. exploreByRole results) fall through
+            # to the generic rendering so nothing is dropped
+            line = f"{pad}{prefix}{value['role']}"
+            if value.get("name"):
+                line += f" {to_json(value['name']).decode()}"
+            for key, item in value.items():
+                if key not in ("role", "name", "children") and _is_scalar(item):
+                    line += f" {key}={_format_scalar(item)}"
+            lines.append(line)
+            children = value.get("children") or []
+            stack.extend((indent + 2, "- ", child) for child in reversed(children))
+
+        elif isinstance(value, dict):
+            if prefix == "- " and all(_is_scalar(item) for item in value.values()):
+                # List items made only of scalars, like links, fit on one line
+                fields = " ".join(f"{k}={_format_scalar(v)}" for k, v in value.items())
+                lines.append(f"{pad}- {fields}")
+                continue
+            if prefix:
+                lines.append(f"{pad}{prefix.rstrip()}")
+                indent += 2
+            stack.extend((indent, f"{k}: ", v) for k, v in reversed(value.items()))
+
+        else:
+            if prefix:
+                lines.append(f"{pad}{prefix.rstrip()}")
+                indent += 2
+            stack.extend((indent, "- ", item) for item in reversed(value))
+
+    return "\n".join(lines)
+
+
+def _dump(payload, output_format: OutputFormat | None = None) -> str:
+    """Serialize a tool result in the requested format, or the server default"""
+    output_format = output_format or os.environ.get("MUDAE_OUTPUT_FORMAT", "pretty")
+    if output_format == "text":
+        return _render_text(payload)
+    # pydantic-core's serializer is several times faster than json.dumps on large trees
+    indent = None if output_format == "compact" else 2
+    with metrics.timer("serialize"):
+        return to_json(payload, indent=indent, fallback=str).decode()
+
+
+def _response_bytes(result) -> int:
+    """Size of a tool result as sent to the client; images count their base64 data"""
+    if isinstance(result, str):
+        return len(result.encode())
+    if isinstance(result, list):
+        return sum(_response_bytes(item) for item in result)
+    if isinstance(result, ImageContent):
+        return len(result.data)
+    if isinstance(result, TextContent):
+        return len(result.text.encode())
+    return 0
+
+
+def _instrumented(tool):
+    """Record calls, errors, latency and response size for a tool, per action or type
+
+    Goes under @mcp.tool() so the registered function keeps the tool's name,
+    docstring and input signature.
+    """
+    name = tool.__name__
+
+    @functools.wraps(tool)
+    async def wrapper(input):
+        label = getattr(input, "action", None) or getattr(input, "type", None) or ""
+        started = time.perf_counter()
+        size = 0
+        error = True
+        try:
+            result = await tool(input)
+            size = _response_bytes(result)
+            error = isinstance(result, str) and _is_error_result(result)
+            return result
+        finally:
+            metrics.record(name, label, time.perf_counter() - started, size, error)
+
+    return wrapper
+
+
+class ElementActionInput(SessionInput):
+    type: Literal["className", "id", "text"] | None = Field(
+        None,
+        description="How to select the element - 'className' for CSS class names, 'id' for element IDs, 'text' for visible text content. Not needed with ref",
+    )
+    selector: str | None = Field(
+        None,
+        description="The selector value: class name (without dot), element ID (without hash), or exact visible text content. Not needed with ref",
+    )
+    ref: str | None = Field(
+        None,
+        description="Element ref (e.g. 'e12') from an accessibility_summary snapshot of the current page; targets that exact element instead of type/selector",
     )
     action: Literal["click", "getText", "extractLinks", "getRawElement", "type"] = (
         Field(
@@ -98,9 +1591,37 @@ class ElementActionInput(BaseModel):
         None,
         description="Text to type into the element (required only when action is 'type')",
     )
+    absolute_urls: bool = Field(
+        False,
+        description="For extractLinks: resolve each href to an absolute URL against the page URL",
+    )
+    dedupe: bool = Field(
+        False,
+        description="For extractLinks: drop links whose href was already returned",
+    )
+    link_domain: str | None = Field(
+        None,
+        description="For extractLinks: only return links to this domain or its subdomains, e.g. 'example.com'",
+    )
+    link_pattern: str | None = Field(
+        None,
+        description="For extractLinks: only return links whose href matches this regular expression (JavaScript syntax)",
+    )
+    include_box: bool = Field(
+        False,
+        description="For getRawElement: include the element's bounding box (x, y, width, height in viewport pixels)",
+    )
+    include_aria: bool = Field(
+        False,
+        description="For getRawElement: include the computed role, accessible name and aria-* attributes. The role and name are read from the browser's accessibility tree, which takes a few more CDP round-trips",
+    )
+    style_properties: list[str] | None = Field(
+        None,
+        description="For getRawElement: computed CSS properties to include, e.g. ['display', 'color', 'font-size']",
+    )
 
 
-class NavigateInput(BaseModel):
+class NavigateInput(SessionInput):
     type: Literal["url", "back", "forward", "refresh"] = Field(
         "url",
         description="Type of navigation: 'url' to navigate to a specific URL, 'back' to go back in history, 'forward' to go forward in history, 'refresh' to reload current page",
@@ -109,12 +1630,38 @@ class NavigateInput(BaseModel):
         None,
         description="The URL to navigate to (required only when type is 'url'). Should include protocol (http:// or https://)",
     )
+    block_resources: bool | None = Field(
+        None,
+        description="Override the session's resource blocking for this navigation only: true to block, false to load everything. Omit to use the session setting",
+    )
+    force_refresh: bool = Field(
+        False,
+        description="Bypass the server's HTTP cache for this navigation: fetch everything from the network and update the cache",
+    )
+    wait_until: Literal["commit", "domcontentloaded", "load", "networkidle", "selector", "quiet_dom"] = Field(
+        "load",
+        description="When to consider navigation finished: 'commit' (response received), 'domcontentloaded', 'load' (all resources), 'networkidle' (no requests for 500ms), 'selector' (wait_selector is present), 'quiet_dom' (no DOM mutations for quiet_ms). Use 'selector' or 'quiet_dom' for SPAs and 'domcontentloaded' for ad-heavy sites",
+    )
+    wait_selector: str | None = Field(
+        None,
+        description="For wait_until='selector': CSS or Playwright selector to wait for",
+    )
+    quiet_ms: int = Field(
+        500,
+        gt=0,
+        description="For wait_until='quiet_dom': how long the DOM must go without mutations",
+    )
+    timeout_ms: int | None = Field(
+        None,
+        gt=0,
+        description="Maximum time for the whole navigation including waiting, in milliseconds (default 30000)",
+    )
 
 
-class SnapshotInput(BaseModel):
-    type: Literal["accessibility", "image", "accessibility_summary", "accessibility_scoped"] = Field(
+class SnapshotInput(SessionInput):
+    type: Literal["accessibility", "image", "image_tiles", "accessibility_summary", "accessibility_scoped", "accessibility_diff"] = Field(
         ...,
-        description="Type of snapshot: 'accessibility' for full tree (use sparingly), 'accessibility_summary' for just interactive elements, 'accessibility_scoped' for specific element subtree, 'image' for visual screenshot",
+        description="Type of snapshot: 'accessibility' for full tree (use sparingly), 'accessibility_summary' for just interactive elements, 'accessibility_scoped' for specific element subtree, 'accessibility_diff' for only the nodes added/removed/changed since the previous 'accessibility' or 'accessibility_diff' snapshot, 'image' for visual screenshot, 'image_tiles' for a range of fixed-height screenshot tiles of a long page",
     )
     selector_type: Literal["className", "id", "text", "role"] | None = Field(
         None,
@@ -124,16 +1671,73 @@ class SnapshotInput(BaseModel):
         None,
         description="For accessibility_scoped: the selector value to scope the accessibility tree to a specific element",
     )
+    full_page: bool = Field(
+        True,
+        description="For image: capture the whole scrollable page (true) or only the current viewport (false)",
+    )
+    image_format: Literal["jpeg", "png", "webp"] = Field(
+        "jpeg",
+        description="For image: encoding of the screenshot",
+    )
+    quality: int = Field(
+        50,
+        ge=1,
+        le=100,
+        description="For image: compression quality for jpeg and webp (ignored for png)",
+    )
+    max_width: int | None = Field(
+        None,
+        gt=0,
+        description="For image: downscale so the image is at most this many pixels wide",
+    )
+    max_height: int | None = Field(
+        None,
+        gt=0,
+        description="For image: downscale so the image is at most this many pixels tall",
+    )
+    tile_height: int | None = Field(
+        None,
+        gt=0,
+        description="For image_tiles: height of each tile in CSS pixels (defaults to the viewport height)",
+    )
+    tile_start: int = Field(
+        0,
+        ge=0,
+        description="For image_tiles: index of the first tile to return",
+    )
+    tile_count: int = Field(
+        1,
+        ge=1,
+        description="For image_tiles: number of consecutive tiles to return",
+    )
+    max_bytes: int | None = Field(
+        None,
+        gt=0,
+        description="For accessibility_summary: size budget in bytes. Returns the most informative tree that fits, taking landmarks and interactive elements breadth-first; cut subtrees are marked with a 'truncated' count. Removes the fixed depth limit",
+    )
+    max_tokens: int | None = Field(
+        None,
+        gt=0,
+        description="For accessibility_summary: size budget in model tokens (about 4 bytes each); combined with max_bytes, the smaller budget wins",
+    )
+    engine: Literal["playwright", "cdp"] | None = Field(
+        None,
+        description="For accessibility_summary: 'playwright' filters Playwright's full snapshot in Python (depth-limited); 'cdp' queries the browser's accessibility tree for interactive and landmark roles only, so nothing else crosses the wire, and returns them at any depth. Defaults to the server setting",
+    )
 
 
-class FillInputInput(BaseModel):
-    type: Literal["className", "id", "text", "placeholder", "label"] = Field(
-        ...,
-        description="How to select the input element: 'className' for CSS class, 'id' for element ID, 'text' for visible text, 'placeholder' for placeholder text, 'label' for associated label text",
+class FillInputInput(SessionInput):
+    type: Literal["className", "id", "text", "placeholder", "label"] | None = Field(
+        None,
+        description="How to select the input element: 'className' for CSS class, 'id' for element ID, 'text' for visible text, 'placeholder' for placeholder text, 'label' for associated label text. Not needed with ref",
     )
-    selector: str = Field(
-        ...,
-        description="The selector value: class name (without dot), element ID (without hash), visible text content, placeholder text, or label text",
+    selector: str | None = Field(
+        None,
+        description="The selector value: class name (without dot), element ID (without hash), visible text content, placeholder text, or label text. Not needed with ref",
+    )
+    ref: str | None = Field(
+        None,
+        description="Element ref (e.g. 'e7') from an accessibility_summary snapshot of the current page; targets that exact input instead of type/selector",
     )
     value: str = Field(
         ...,
@@ -141,28 +1745,253 @@ class FillInputInput(BaseModel):
     )
 
 
-class ExploreByRoleInput(BaseModel):
+class ExploreByRoleInput(SessionInput):
     role: Literal["banner", "main", "navigation", "contentinfo", "form", "region", "article", "section", "complementary", "search"] = Field(
         ...,
         description="ARIA landmark role to explore: 'banner' (header), 'main' (main content), 'navigation' (nav menus), 'contentinfo' (footer), 'form', 'region', 'article', 'section', 'complementary' (sidebar), 'search'",
     )
 
 
-@mcp.tool()
-def get_active_page(ctx) -> Page:
-    """Get the currently active page instance for internal use by other tools"""
-    app_context = ctx.request_context.lifespan_context
-    return app_context.page
+class ResourceBlockingInput(SessionInput):
+    enabled: bool | None = Field(
+        None,
+        description="Turn blocking on or off for this session. Omit to leave unchanged",
+    )
+    resource_types: list[Literal["document", "stylesheet", "image", "media", "font", "script", "texttrack", "xhr", "fetch", "eventsource", "websocket", "manifest", "other"]] | None = Field(
+        None,
+        description="Replace the blocked resource types, e.g. ['image', 'font', 'media']. Omit to leave unchanged",
+    )
+    url_globs: list[str] | None = Field(
+        None,
+        description="Replace the blocked URL globs, e.g. ['*.mp4', '*/analytics/*']. Omit to leave unchanged",
+    )
+    domains: list[str] | None = Field(
+        None,
+        description="Replace the blocked domains; subdomains are blocked too, e.g. ['doubleclick.net']. Omit to leave unchanged",
+    )
+
+
+class StorageStateInput(SessionInput):
+    name: str = Field(
+        ...,
+        description="Name of the saved state, e.g. 'internal-wiki'. Stored as <name>.json in the server's state directory",
+    )
+
+
+class LoadStorageStateInput(StorageStateInput):
+    url: str | None = Field(
+        None,
+        description="Page to open once the state is loaded, e.g. the app's start page",
+    )
+
+
+class BatchStepOptions(BaseModel):
+    # Not timeout_ms, which navigate steps already use for the navigation itself
+    step_timeout_ms: int | None = Field(
+        None,
+        gt=0,
+        description="Timeout for this step in milliseconds; defaults to the batch's step_timeout_ms",
+    )
+
+
+class ElementActionStep(ElementActionInput, BatchStepOptions):
+    tool: Literal["getElement"] = Field(..., description="Run a getElement action")
+
+
+class FillInputStep(FillInputInput, BatchStepOptions):
+    tool: Literal["fillInput"] = Field(..., description="Run a fillInput action")
+
+
+class NavigateStep(NavigateInput, BatchStepOptions):
+    tool: Literal["navigate"] = Field(..., description="Run a navigate action")
+
+
+class BatchActionsInput(SessionInput):
+    steps: list[
+        Annotated[
+            ElementActionStep | FillInputStep | NavigateStep,
+            Field(discriminator="tool"),
+        ]
+    ] = Field(
+        ...,
+        description="Ordered steps to run. Each step is the input of getElement, fillInput or navigate plus a 'tool' field naming which one. Steps always run in the batch's session; a step's own session_id is ignored",
+    )
+    stop_on_error: bool = Field(
+        True,
+        description="Stop at the first failing step instead of running the remaining steps",
+    )
+    step_timeout_ms: int = Field(
+        30000,
+        gt=0,
+        description="Default timeout for each step in milliseconds",
+    )
+
+
+class MetricsInput(BaseModel):
+    format: Literal["json", "prometheus"] = Field(
+        "json",
+        description="'json' for per-tool summaries with p50/p95 latency, or 'prometheus' for the raw counters and histograms in Prometheus text format",
+    )
+    reset: bool = Field(
+        False,
+        description="Clear all counters after reading them",
+    )
+    output_format: OutputFormat | None = Field(
+        None,
+        description="Format of the JSON result: 'pretty', 'compact' or 'text'. Defaults to the server setting",
+    )
+
+
+@asynccontextmanager
+async def get_active_session(
+    ctx, session_id: str = DEFAULT_SESSION_ID, mutates: bool = False
+) -> AsyncIterator[Session]:
+    """Check out a session for the duration of a tool call
+
+    Pass mutates=True for tools that act on the page, so cached snapshots are
+    dropped rather than waiting for the in-page change notification.
+    """
+    pool = ctx.request_context.lifespan_context.pool
+    session = await pool.acquire(session_id)
+    try:
+        yield session
+    finally:
+        if mutates:
+            session.invalidate()
+        pool.release(session)
 
 
 @mcp.tool()
-async def getElement(input: ElementActionInput) -> str:
-    """Find an element on the page and perform actions like clicking, getting text, or typing. Use this for interacting with buttons, links, text content, and form elements. Supports selecting elements by CSS class, ID, or visible text content."""
+@_instrumented
+async def closeSession(input: SessionInput) -> str:
+    """Close a browser session and free its context and tab. Use this when an agent is done with a session so the slot can be reused."""
     ctx = mcp.get_context()
-    page = get_active_page(ctx)
+    pool = ctx.request_context.lifespan_context.pool
+
+    try:
+        if await pool.close(input.session_id):
+            return f"Successfully closed session '{input.session_id}'"
+        return f"Session '{input.session_id}' does not exist"
+    except Exception as e:
+        return f"Error closing session '{input.session_id}': {str(e)}"
+
+
+# Collects href/text for every link under an element, filtering in the page so
+# only the matching links cross the wire
+_EXTRACT_LINKS_SCRIPT = """
+(root, opts) => {
+  const domain = opts.domain ? opts.domain.toLowerCase() : null;
+  const pattern = opts.pattern ? new RegExp(opts.pattern) : null;
+  const seen = new Set();
+  const links = [];
+  for (const a of root.querySelectorAll("a")) {
+    const raw = a.getAttribute("href");
+    const href = opts.absolute && raw !== null ? a.href : raw;
+    if (domain) {
+      let host;
+      try {
+        host = new URL(a.href).hostname.toLowerCase();
+      } catch {
+        continue;
+      }
+      if (host !== domain && !host.endsWith("." + domain)) continue;
+    }
+    if (pattern && (href === null || !pattern.test(href))) continue;
+    if (opts.dedupe) {
+      if (seen.has(href)) continue;
+      seen.add(href);
+    }
+    links.push({ href, text: a.textContent });
+  }
+  return links;
+}
+"""
+
+
+# Mirrors Playwright's is_visible/is_enabled checks so getRawElement needs
+# only one evaluation regardless of how many fields are requested
+_RAW_ELEMENT_SCRIPT = """
+(el, opts) => {
+  const rect = el.getBoundingClientRect();
+  const style = getComputedStyle(el);
+  const info = {
+    tag_name: el.tagName.toLowerCase(),
+    text_content: el.textContent,
+    visible: rect.width > 0 && rect.height > 0 && style.visibility !== "hidden",
+    enabled: !el.matches(":disabled") && !el.closest('[aria-disabled="true"]'),
+    attributes: Object.fromEntries([...el.attributes].map(attr => [attr.name, attr.value])),
+  };
+  if (opts.box) {
+    info.bounding_box = { x: rect.x, y: rect.y, width: rect.width, height: rect.height };
+  }
+  if (opts.aria) {
+    // role and name are filled in from the accessibility tree by the caller,
+    // which picks the element up from this global over CDP
+    window.__mudaeAriaTarget = el;
+    info.aria = {
+      properties: Object.fromEntries(
+        [...el.attributes]
+          .filter(attr => attr.name.startsWith("aria-"))
+          .map(attr => [attr.name, attr.value])
+      ),
+    };
+  }
+  if (opts.styles.length) {
+    info.styles = Object.fromEntries(
+      opts.styles.map(name => [name, style.getPropertyValue(name)])
+    );
+  }
+  return info;
+}
+"""
+
+
+async def _element_ax_node(session: Session) -> dict | None:
+    """Return the accessibility node of the element left in window.__mudaeAriaTarget
+
+    Only that node is computed and sent, not its subtree. Playwright does not
+    expose an element's CDP object id, so _RAW_ELEMENT_SCRIPT hands the element
+    over through a page global. Elements in child frames are not found.
+    """
+    cdp = await session.cdp_session()
+    handle = await cdp.send(
+        "Runtime.evaluate",
+        {
+            "expression": "(() => { const el = window.__mudaeAriaTarget; "
+            "delete window.__mudaeAriaTarget; return el; })()"
+        },
+    )
+    object_id = handle["result"].get("objectId")
+    if object_id is None:
+        return None
+    try:
+        partial = await cdp.send(
+            "Accessibility.getPartialAXTree", {"objectId": object_id, "fetchRelatives": False}
+        )
+    finally:
+        await cdp.send("Runtime.releaseObject", {"objectId": object_id})
+    return partial["nodes"][0] if partial["nodes"] else None
+
+
+def _unknown_ref_error(ref: str) -> str:
+    return (
+        f"Error: Unknown ref '{ref}'. Refs are reset when the page navigates; "
+        "take a new accessibility_summary snapshot"
+    )
+
+
+async def _perform_element_action(session: Session, input: ElementActionInput) -> str:
+    """Run an element action in a session; shared by getElement and batchActions"""
+    page = session.page
 
     # Build selector based on type
-    if input.type == "className":
+    if input.ref is not None:
+        if input.ref not in session.refs:
+            return _unknown_ref_error(input.ref)
+        selector = f"ref={input.ref}"
+    elif input.type is None or input.selector is None:
+        return "Error: Either 'ref' or both 'type' and 'selector' are required"
+    elif input.type == "className":
         selector = f".{input.selector}"
     elif input.type == "id":
         selector = f"#{input.selector}"
@@ -174,7 +2003,10 @@ async def getElement(input: ElementActionInput) -> str:
         )
 
     try:
-        element = await page.query_selector(selector)
+        if input.ref is not None:
+            element = await session.resolve_ref(input.ref)
+        else:
+            element = await page.query_selector(selector)
         if not element:
             return f"Element not found with selector: {selector}"
 
@@ -185,38 +2017,51 @@ async def getElement(input: ElementActionInput) -> str:
 
         elif input.action == "getText":
             text_content = await element.text_content()
-            return json.dumps(
+            return _dump(
                 {"action": "getText", "selector": selector, "text": text_content},
-                indent=2,
+                input.output_format,
             )
 
         elif input.action == "extractLinks":
-            # Get all links within this element
-            links = await element.query_selector_all("a")
-            link_data = []
-            for link in links:
-                href = await link.get_attribute("href")
-                text = await link.text_content()
-                link_data.append({"href": href, "text": text})
-
-            return json.dumps(
+            # Get all links within this element in a single round-trip
+            link_data = await element.evaluate(
+                _EXTRACT_LINKS_SCRIPT,
+                {
+                    "absolute": input.absolute_urls,
+                    "dedupe": input.dedupe,
+                    "domain": input.link_domain,
+                    "pattern": input.link_pattern,
+                },
+            )
+
+            return _dump(
                 {"action": "extractLinks", "selector": selector, "links": link_data},
-                indent=2,
+                input.output_format,
             )
 
         elif input.action == "getRawElement":
-            element_info = {
-                "action": "getRawElement",
-                "selector": selector,
-                "tag_name": await element.evaluate("el => el.tagName.toLowerCase()"),
-                "text_content": await element.text_content(),
-                "visible": await element.is_visible(),
-                "enabled": await element.is_enabled(),
-                "attributes": await element.evaluate(
-                    "el => Object.fromEntries([...el.attributes].map(attr => [attr.name, attr.value]))"
-                ),
-            }
-            return json.dumps(element_info, indent=2)
+            # Collect every requested field in a single round-trip
+            element_info = {"action": "getRawElement", "selector": selector}
+            element_info.update(
+                await element.evaluate(
+                    _RAW_ELEMENT_SCRIPT,
+                    {
+                        "box": input.include_box,
+                        "aria": input.include_aria,
+                        "styles": input.style_properties or [],
+                    },
+                )
+            )
+            if input.include_aria:
+                # Pages cannot read the computed role and name, so they come from
+                # the browser's accessibility tree, implicit roles included
+                node = await _element_ax_node(session) or {}
+                element_info["aria"] = {
+                    "role": node.get("role", {}).get("value"),
+                    "name": node.get("name", {}).get("value"),
+                    **element_info["aria"],
+                }
+            return _dump(element_info, input.output_format)
 
         elif input.action == "type":
             if input.text is None:
@@ -235,29 +2080,205 @@ async def getElement(input: ElementActionInput) -> str:
 
 
 @mcp.tool()
-async def navigate(input: NavigateInput) -> str:
-    """Navigate to a specific URL or perform browser history navigation. Use this to visit websites, go back/forward in browser history, or refresh the current page. Essential for browsing between different web pages."""
+@_instrumented
+async def configureBlocking(input: ResourceBlockingInput) -> str:
+    """Block heavy or unwanted requests (images, fonts, media, ads, analytics) for a session to speed up page loads. Fields that are omitted keep their current value; call with only session_id to see the current rules and how many requests were blocked."""
+    ctx = mcp.get_context()
+    async with get_active_session(ctx, input.session_id) as session:
+        blocking = session.blocking
+        try:
+            if input.enabled is not None:
+                blocking.enabled = input.enabled
+            if input.resource_types is not None:
+                blocking.resource_types = set(input.resource_types)
+            if input.url_globs is not None:
+                blocking.url_globs = input.url_globs
+            if input.domains is not None:
+                blocking.domains = [domain.lower() for domain in input.domains]
+            if blocking.enabled and blocking.has_rules:
+                await _install_resource_blocking(session)
+            return _dump(
+                {"session_id": input.session_id, **blocking.status()},
+                input.output_format,
+            )
+        except Exception as e:
+            return f"Error configuring resource blocking: {str(e)}"
+
+
+@mcp.tool()
+@_instrumented
+async def saveStorageState(input: StorageStateInput) -> str:
+    """Save a session's cookies and localStorage under a name, e.g. right after logging in. Load it later with loadStorageState to start other sessions already logged in, instead of repeating the login flow."""
+    ctx = mcp.get_context()
+    async with get_active_session(ctx, input.session_id) as session:
+        try:
+            path = _storage_state_path(input.name)
+            state = await session.context.storage_state()
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # The state holds credentials, so the file is private to the user
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "wb") as f:
+                f.write(to_json(state))
+            return _dump(
+                {
+                    "session_id": input.session_id,
+                    "name": input.name,
+                    "path": path,
+                    "cookies": len(state.get("cookies", [])),
+                    "origins": len(state.get("origins", [])),
+                },
+                input.output_format,
+            )
+        except Exception as e:
+            return f"Error saving storage state '{input.name}': {str(e)}"
+
+
+@mcp.tool()
+@_instrumented
+async def loadStorageState(input: LoadStorageStateInput) -> str:
+    """Start a session from a state saved with saveStorageState, so it begins with the saved cookies and localStorage (e.g. already logged in). Replaces the session's context, or creates the session if it does not exist, and optionally opens a URL."""
+    ctx = mcp.get_context()
+    pool = ctx.request_context.lifespan_context.pool
+    try:
+        path = _storage_state_path(input.name)
+        with open(path, "rb") as f:
+            state = json.load(f)
+        await pool.reseed(input.session_id, path)
+    except FileNotFoundError:
+        return f"Error: No saved storage state named '{input.name}'"
+    except Exception as e:
+        return f"Error loading storage state '{input.name}': {str(e)}"
+
+    result = {
+        "session_id": input.session_id,
+        "name": input.name,
+        "cookies": len(state.get("cookies", [])),
+        "origins": len(state.get("origins", [])),
+    }
+    if input.url:
+        async with get_active_session(ctx, input.session_id, mutates=True) as session:
+            try:
+                response = await session.page.goto(
+                    input.url, timeout=DEFAULT_NAVIGATION_TIMEOUT_MS
+                )
+                result["url"] = session.page.url
+                result["status"] = response.status if response else None
+            except Exception as e:
+                return f"Error opening {input.url} after loading storage state: {str(e)}"
+    return _dump(result, input.output_format)
+
+
+@mcp.tool()
+@_instrumented
+async def getElement(input: ElementActionInput) -> str:
+    """Find an element on the page and perform actions like clicking, getting text, or typing. Use this for interacting with buttons, links, text content, and form elements. Supports selecting elements by CSS class, ID, or visible text content, or by a ref from an accessibility_summary snapshot."""
     ctx = mcp.get_context()
-    page = get_active_page(ctx)
+    async with get_active_session(ctx, input.session_id, mutates=True) as session:
+        return await _perform_element_action(session, input)
+
+
+# Resolves once the DOM has gone quietMs without mutations, or after timeoutMs
+_QUIET_DOM_SCRIPT = """
+({ quietMs, timeoutMs }) => new Promise(resolve => {
+  let timer;
+  let deadline;
+  const observer = new MutationObserver(() => {
+    clearTimeout(timer);
+    timer = setTimeout(() => finish(true), quietMs);
+  });
+  const finish = quiet => {
+    observer.disconnect();
+    clearTimeout(timer);
+    clearTimeout(deadline);
+    resolve(quiet);
+  };
+  observer.observe(document, {
+    subtree: true, childList: true, attributes: true, characterData: true,
+  });
+  timer = setTimeout(() => finish(true), quietMs);
+  deadline = setTimeout(() => finish(false), timeoutMs);
+})
+"""
+
+DEFAULT_NAVIGATION_TIMEOUT_MS = 30000
+
+
+async def _wait_for_content(page: Page, input: NavigateInput, started: float) -> None:
+    """Apply the selector/quiet_dom wait strategies within the remaining timeout"""
+    timeout_ms = input.timeout_ms or DEFAULT_NAVIGATION_TIMEOUT_MS
+    remaining_ms = max(timeout_ms - (time.perf_counter() - started) * 1000, 1)
+    if input.wait_until == "selector":
+        await page.wait_for_selector(input.wait_selector, timeout=remaining_ms)
+    elif input.wait_until == "quiet_dom":
+        quiet = await page.evaluate(
+            _QUIET_DOM_SCRIPT, {"quietMs": input.quiet_ms, "timeoutMs": remaining_ms}
+        )
+        if not quiet:
+            # Same outcome as a selector wait running out of time
+            raise TimeoutError(
+                f"DOM did not stay quiet for {input.quiet_ms} ms within {timeout_ms} ms"
+            )
+
 
+async def _perform_navigation(session: Session, input: NavigateInput) -> str:
+    """Run a navigation in a session; shared by navigate and batchActions"""
+    page = session.page
+
+    if input.wait_until == "selector" and not input.wait_selector:
+        return "Error: wait_selector parameter is required when wait_until is 'selector'"
+
+    # selector/quiet_dom start waiting once the document has been parsed
+    if input.wait_until in ("selector", "quiet_dom"):
+        wait_until = "domcontentloaded"
+    else:
+        wait_until = input.wait_until
+    options = {"wait_until": wait_until, "timeout": input.timeout_ms}
+
+    blocking = session.blocking
+    blocked_before = sum(blocking.blocked.values())
+    cache_hits_before = session.cache_hits
+    session.cache_refresh = input.force_refresh
+    if input.block_resources is not None:
+        if input.block_resources and not blocking.installed:
+            await _install_resource_blocking(session)
+        blocking.override = input.block_resources
+
+    def details(response) -> str:
+        parts = []
+        if response is not None:
+            parts.append(f"status {response.status}")
+        parts.append(f"{(time.perf_counter() - started) * 1000:.0f} ms")
+        blocked = sum(blocking.blocked.values()) - blocked_before
+        if blocked:
+            parts.append(f"blocked {blocked} requests")
+        cached = session.cache_hits - cache_hits_before
+        if cached:
+            parts.append(f"{cached} responses from cache")
+        return f" ({', '.join(parts)})"
+
+    started = time.perf_counter()
     try:
         if input.type == "url":
             if input.url is None:
                 return "Error: url parameter is required when type is 'url'"
-            await page.goto(input.url)
-            return f"Successfully navigated to {input.url}"
+            response = await page.goto(input.url, **options)
+            await _wait_for_content(page, input, started)
+            return f"Successfully navigated to {input.url}{details(response)}"
 
         elif input.type == "back":
-            await page.go_back()
-            return "Successfully navigated back"
+            response = await page.go_back(**options)
+            await _wait_for_content(page, input, started)
+            return f"Successfully navigated back{details(response)}"
 
         elif input.type == "forward":
-            await page.go_forward()
-            return "Successfully navigated forward"
+            response = await page.go_forward(**options)
+            await _wait_for_content(page, input, started)
+            return f"Successfully navigated forward{details(response)}"
 
         elif input.type == "refresh":
-            await page.reload()
-            return "Successfully refreshed the page"
+            response = await page.reload(**options)
+            await _wait_for_content(page, input, started)
+            return f"Successfully refreshed the page{details(response)}"
 
         else:
             return f"Error: Invalid navigation type '{input.type}'. Must be 'url', 'back', 'forward', or 'refresh'"
@@ -265,6 +2286,19 @@ async def navigate(input: NavigateInput) -> str:
     except Exception as e:
         return f"Error performing navigation '{input.type}': {str(e)}"
 
+    finally:
+        blocking.override = None
+        session.cache_refresh = False
+
+
+@mcp.tool()
+@_instrumented
+async def navigate(input: NavigateInput) -> str:
+    """Navigate to a specific URL or perform browser history navigation. Use this to visit websites, go back/forward in browser history, or refresh the current page. Essential for browsing between different web pages."""
+    ctx = mcp.get_context()
+    async with get_active_session(ctx, input.session_id, mutates=True) as session:
+        return await _perform_navigation(session, input)
+
 
 def _build_selector(selector_type: str, selector: str) -> str:
     """Build a playwright selector from type and value"""
@@ -280,133 +2314,668 @@ def _build_selector(selector_type: str, selector: str) -> str:
         raise ValueError(f"Invalid selector type: {selector_type}")
 
 
-def _filter_interactive_elements(node, max_depth=3, current_depth=0):
+# Interactive roles we care about
+INTERACTIVE_ROLES = frozenset({
+    'button', 'link', 'textbox', 'combobox', 'listbox', 'option', 
+    'checkbox', 'radio', 'tab', 'menuitem', 'treeitem', 'gridcell',
+    'columnheader', 'rowheader', 'searchbox', 'slider', 'spinbutton'
+})
+
+# Always include certain structural roles at any depth
+STRUCTURAL_ROLES = frozenset({'main', 'navigation', 'banner', 'contentinfo', 'form', 'region'})
+
+
+# Attributes kept on interactive nodes in summaries
+INTERACTIVE_ATTRIBUTES = ('ref', 'value', 'checked', 'selected', 'expanded', 'disabled', 'level')
+
+
+def _assign_refs(session: Session, root) -> None:
+    """Tag every interactive node in a full tree with the session's ref for it
+
+    Nodes are numbered in document order the way getByRole counts them: per role
+    and exact name for named nodes, per role alone for unnamed ones.
+    """
+    by_role = Counter()
+    by_name = Counter()
+    stack = [root] if root else []
+    while stack:
+        node = stack.pop()
+        role = (node.get('role') or '').lower()
+        if role in INTERACTIVE_ROLES:
+            name = node.get('name') or None
+            nth = by_name[role, name] if name else by_role[role]
+            by_role[role] += 1
+            if name:
+                by_name[role, name] += 1
+            node['ref'] = session.ref_for(role, name, nth)
+        children = node.get('children')
+        if children:
+            stack.extend(reversed(children))
+
+
+@dataclass
+class TreeSummary:
+    """Result of a single pass over an accessibility tree"""
+
+    # Interactive/structural nodes down to max_depth, or None for an empty tree
+    summary: dict | None
+    # Whether the node or any descendant visited has an interactive role
+    has_interactive: bool
+    # Number of nodes visited
+    node_count: int
+
+
+def _process_accessibility_tree(
+    root, max_depth: int | None = 3, full: bool = False
+) -> TreeSummary:
+    """Filter, flag and count an accessibility tree in one iterative pass
+
+    Nodes are laid out breadth-first so every child sits after its parent, then
+    folded back to front, so each node is finished before its parent needs it.
+    No recursion, so arbitrarily deep trees are safe. Nodes below max_depth are
+    only visited when full=True, which makes has_interactive and node_count
+    cover the whole tree.
+    """
+    if not root:
+        return TreeSummary(summary=None, has_interactive=False, node_count=0)
+
+    limit = None if full else max_depth
+    nodes = [root]
+    depths = [0]
+    parents = [-1]
+    index = 0
+    while index < len(nodes):
+        children = nodes[index].get('children')
+        if children and (limit is None or depths[index] < limit):
+            depth = depths[index] + 1
+            nodes.extend(children)
+            depths.extend([depth] * len(children))
+            parents.extend([index] * len(children))
+        index += 1
+
+    count = len(nodes)
+    filtered_children = [None] * count
+    has_interactive = [False] * count
+    node_counts = [1] * count
+    result = None
+
+    for index in range(count - 1, -1, -1):
+        node = nodes[index]
+        depth = depths[index]
+        role = (node.get('role') or '').lower()
+        interactive = role in INTERACTIVE_ROLES
+        if interactive:
+            has_interactive[index] = True
+
+        # Include this node if it's interactive, structural, or has interesting children
+        result = None
+        kept_children = filtered_children[index]
+        if (max_depth is None or depth <= max_depth) and (
+            interactive
+            or role in STRUCTURAL_ROLES
+            or kept_children
+            or depth == 0  # Always include root
+        ):
+            result = {'role': node.get('role'), 'name': node.get('name')}
+
+            # Add key attributes for interactive elements
+            if interactive:
+                for attr in INTERACTIVE_ATTRIBUTES:
+                    if attr in node:
+                        result[attr] = node[attr]
+
+            if kept_children:
+                # Children were folded in back to front
+                kept_children.reverse()
+                result['children'] = kept_children
+
+        parent = parents[index]
+        if parent >= 0:
+            node_counts[parent] += node_counts[index]
+            if has_interactive[index]:
+                has_interactive[parent] = True
+            if result is not None:
+                if filtered_children[parent] is None:
+                    filtered_children[parent] = []
+                filtered_children[parent].append(result)
+
+    return TreeSummary(
+        summary=result, has_interactive=has_interactive[0], node_count=node_counts[0]
+    )
+
+
+def _filter_interactive_elements(node, max_depth: int | None = 3):
     """Filter accessibility tree to show only interactive elements, with depth limit"""
-    if not node or current_depth > max_depth:
-        return None
-    
-    # Interactive roles we care about
-    interactive_roles = {
-        'button', 'link', 'textbox', 'combobox', 'listbox', 'option', 
-        'checkbox', 'radio', 'tab', 'menuitem', 'treeitem', 'gridcell',
-        'columnheader', 'rowheader', 'searchbox', 'slider', 'spinbutton'
+    return _process_accessibility_tree(node, max_depth).summary
+
+
+def _flatten_accessibility_tree(node) -> dict[str, dict]:
+    """Flatten an accessibility tree into {path: properties} keyed by a stable path
+
+    Each path segment is 'role "name"' plus an index among siblings with the same
+    role and name, so unrelated insertions elsewhere do not shift a node's key.
+    """
+    flat = {}
+    if not node:
+        return flat
+
+    stack = [("/", node)]
+    while stack:
+        path, current = stack.pop()
+        flat[path] = {k: v for k, v in current.items() if k != "children"}
+
+        seen = {}
+        for child in current.get("children", []):
+            key = (child.get("role"), child.get("name"))
+            index = seen.get(key, 0)
+            seen[key] = index + 1
+            segment = f'{child.get("role")} "{child.get("name") or ""}"[{index}]'
+            stack.append((f"{path.rstrip('/')}/{segment}", child))
+
+    return flat
+
+
+def _diff_accessibility_trees(before: dict[str, dict], after: dict[str, dict]) -> dict:
+    """Compute added/removed/changed nodes between two flattened trees"""
+    added = [{"path": path, **after[path]} for path in after if path not in before]
+    removed = [path for path in before if path not in after]
+    changed = []
+    for path, props in after.items():
+        previous = before.get(path)
+        if previous is None or previous == props:
+            continue
+        changes = {
+            key: [previous.get(key), props.get(key)]
+            for key in previous.keys() | props.keys()
+            if previous.get(key) != props.get(key)
+        }
+        changed.append({"path": path, "changes": changes})
+
+    return {"added": added, "removed": removed, "changed": changed}
+
+
+async def _capture_clip(
+    cdp: CDPSession, clip: dict, input: SnapshotInput, beyond_viewport: bool
+) -> ImageContent:
+    """Capture a region of the page in CSS pixels, downscaled to fit max_width/max_height"""
+    scale = 1.0
+    if input.max_width or input.max_height:
+        # Captures come out in device pixels, so the limits are converted to CSS pixels
+        ratio = await cdp.send(
+            "Runtime.evaluate", {"expression": "window.devicePixelRatio", "returnByValue": True}
+        )
+        device_scale = ratio["result"].get("value") or 1.0
+        if input.max_width:
+            scale = min(scale, input.max_width / device_scale / max(clip["width"], 1))
+        if input.max_height:
+            scale = min(scale, input.max_height / device_scale / max(clip["height"], 1))
+
+    params = {
+        "format": input.image_format,
+        "clip": {**clip, "scale": scale},
+        "captureBeyondViewport": beyond_viewport,
     }
-    
-    # Always include certain structural roles at any depth
-    structural_roles = {'main', 'navigation', 'banner', 'contentinfo', 'form', 'region'}
-    
-    result = None
-    filtered_children = []
-    
-    # Process children first
-    for child in node.get('children', []):
-        filtered_child = _filter_interactive_elements(child, max_depth, current_depth + 1)
-        if filtered_child:
-            filtered_children.append(filtered_child)
-    
-    # Include this node if it's interactive, structural, or has interesting children
-    role = node.get('role', '').lower()
-    if (role in interactive_roles or 
-        role in structural_roles or 
-        filtered_children or
-        current_depth == 0):  # Always include root
-        
-        result = {
-            'role': node.get('role'),
-            'name': node.get('name'),
+    if input.image_format != "png":
+        params["quality"] = input.quality
+
+    # CDP already returns base64, which is passed through without decoding
+    with metrics.timer("screenshot"):
+        screenshot = await cdp.send("Page.captureScreenshot", params)
+    return ImageContent(
+        type="image", data=screenshot["data"], mimeType=f"image/{input.image_format}"
+    )
+
+
+async def _capture_screenshot(session: Session, input: SnapshotInput) -> ImageContent:
+    """Capture the viewport or the full page through CDP"""
+    cdp = await session.cdp_session()
+    layout = await cdp.send("Page.getLayoutMetrics")
+    viewport = layout["cssVisualViewport"]
+    if input.full_page:
+        content = layout["cssContentSize"]
+        clip = {"x": 0, "y": 0, "width": content["width"], "height": content["height"]}
+    else:
+        clip = {
+            "x": viewport["pageX"],
+            "y": viewport["pageY"],
+            "width": viewport["clientWidth"],
+            "height": viewport["clientHeight"],
         }
-        
-        # Add key attributes for interactive elements
-        if role in interactive_roles:
-            for attr in ['value', 'checked', 'selected', 'expanded', 'disabled', 'level']:
-                if attr in node:
-                    result[attr] = node[attr]
-        
-        if filtered_children:
-            result['children'] = filtered_children
-    
+    return await _capture_clip(cdp, clip, input, beyond_viewport=input.full_page)
+
+
+async def _capture_tiles(
+    session: Session, input: SnapshotInput
+) -> list[TextContent | ImageContent]:
+    """Capture only the requested range of fixed-height tiles of the full page"""
+    cdp = await session.cdp_session()
+    layout = await cdp.send("Page.getLayoutMetrics")
+    content = layout["cssContentSize"]
+    tile_height = input.tile_height or layout["cssVisualViewport"]["clientHeight"]
+    total_tiles = max(1, math.ceil(content["height"] / tile_height))
+
+    if input.tile_start >= total_tiles:
+        return [
+            TextContent(
+                type="text",
+                text=f"Error: tile_start {input.tile_start} is out of range, page has {total_tiles} tiles",
+            )
+        ]
+
+    end = min(input.tile_start + input.tile_count, total_tiles)
+    tiles = []
+    for index in range(input.tile_start, end):
+        y = index * tile_height
+        clip = {
+            "x": 0,
+            "y": y,
+            "width": content["width"],
+            "height": min(tile_height, content["height"] - y),
+        }
+        tiles.append(await _capture_clip(cdp, clip, input, beyond_viewport=True))
+
+    summary = {
+        "type": "image_tiles",
+        "total_tiles": total_tiles,
+        "tile_height": tile_height,
+        "page_height": content["height"],
+        "tiles": list(range(input.tile_start, end)),
+    }
+    return [TextContent(type="text", text=_dump(summary, input.output_format)), *tiles]
+
+
+def _budget_interactive_elements(node, max_bytes: int) -> tuple[dict | None, dict]:
+    """Fit the interactive summary of a tree into roughly max_bytes of compact JSON
+
+    Nodes are taken breadth-first, landmarks and interactive nodes before plain
+    containers at the same depth, until the budget runs out. Nodes whose children
+    were cut get a 'truncated' count of the omitted descendants.
+    """
+    summary = _filter_interactive_elements(node, max_depth=None)
+    if summary is None:
+        return None, {"max_bytes": max_bytes, "nodes": 0, "truncated_nodes": 0}
+
+    # Number of descendants under each filtered node, for the truncation markers
+    descendants = {}
+    order = []
+    stack = [summary]
+    while stack:
+        current = stack.pop()
+        order.append(current)
+        stack.extend(current.get("children", []))
+    for current in reversed(order):
+        descendants[id(current)] = sum(
+            1 + descendants[id(child)] for child in current.get("children", [])
+        )
+
+    def rank(current) -> int:
+        role = (current.get("role") or "").lower()
+        if role in STRUCTURAL_ROLES:
+            return 0
+        if role in INTERACTIVE_ROLES:
+            return 1
+        return 2
+
+    def cost(current) -> int:
+        props = {k: v for k, v in current.items() if k != "children"}
+        size = len(to_json(props, fallback=str)) + 1
+        if current.get("children"):
+            # Room for '"children":[]' and a worst-case '"truncated":N' marker
+            size += 13 + len(',"truncated":') + len(str(descendants[id(current)]))
+        return size
+
+    copies = {}
+    included = 0
+    remaining = max_bytes
+    sequence = 0
+    heap = [(0, rank(summary), sequence, summary, None)]
+    while heap:
+        depth, _, _, current, parent_copy = heapq.heappop(heap)
+        size = cost(current)
+        if size > remaining and included:
+            continue
+        remaining -= size
+        included += 1
+
+        node_copy = {k: v for k, v in current.items() if k != "children"}
+        if parent_copy is not None:
+            parent_copy.setdefault("children", []).append(node_copy)
+        copies[id(current)] = node_copy
+        for child in current.get("children", []):
+            sequence += 1
+            heapq.heappush(heap, (depth + 1, rank(child), sequence, child, node_copy))
+
+    # Mark every included node that lost part of its subtree
+    truncated_total = 0
+    for current in order:
+        node_copy = copies.get(id(current))
+        if node_copy is None:
+            continue
+        kept = [c for c in current.get("children", []) if id(c) in copies]
+        omitted = sum(
+            1 + descendants[id(c)]
+            for c in current.get("children", [])
+            if id(c) not in copies
+        )
+        if omitted:
+            node_copy["truncated"] = omitted
+            truncated_total += omitted
+        if kept:
+            # Keep document order, which the priority queue does not preserve
+            position = {id(copies[id(c)]): i for i, c in enumerate(kept)}
+            node_copy["children"].sort(key=lambda c: position[id(c)])
+
+    stats = {"max_bytes": max_bytes, "nodes": included, "truncated_nodes": truncated_total}
+    return copies[id(summary)], stats
+
+
+# Retries allowed to shrink a budgeted summary until its final output fits
+BUDGET_ATTEMPTS = 6
+
+
+def _dump_budgeted_summary(tree, max_bytes: int, output_format: OutputFormat | None) -> str:
+    """Serialize a budgeted accessibility_summary that fits max_bytes in the output format
+
+    _budget_interactive_elements sizes nodes as compact JSON. Pretty and text
+    output differ from that, so the inner budget is scaled down by the measured
+    overshoot until the emitted result, envelope included, fits.
+    """
+    target = max_bytes
+    for _ in range(BUDGET_ATTEMPTS):
+        with metrics.timer("filter"):
+            summary, stats = _budget_interactive_elements(tree, target)
+        stats["max_bytes"] = max_bytes
+        result = _dump(
+            {"type": "accessibility_summary", "budget": stats, "snapshot": summary},
+            output_format,
+        )
+        size = len(result.encode())
+        if size <= max_bytes or stats["nodes"] <= 1:
+            break
+        # Aim slightly under, since overhead is not exactly proportional
+        target = int(target * max_bytes / size * 0.95)
     return result
 
 
-@mcp.tool()
-async def getSnapshot(input: SnapshotInput) -> str:
-    """Capture page state as accessibility tree or screenshot. Use 'accessibility_summary' for interactive elements overview, 'accessibility_scoped' to explore specific sections, 'accessibility' for full tree (avoid for large pages), 'image' for visual confirmation."""
-    ctx = mcp.get_context()
-    page = get_active_page(ctx)
+# Roles fetched by the CDP snapshot engine
+_SUMMARY_ROLES = sorted(INTERACTIVE_ROLES | STRUCTURAL_ROLES)
 
-    try:
-        if input.type == "accessibility":
-            # Get full accessibility tree snapshot (use sparingly)
-            accessibility_tree = await page.accessibility.snapshot()
-            return json.dumps(
-                {"type": "accessibility", "snapshot": accessibility_tree}, indent=2
-            )
+def _ax_property(value):
+    """Convert a CDP AXValue to the plain value Playwright snapshots use"""
+    value = value.get("value")
+    if value in ("true", "false"):
+        return value == "true"
+    return value
 
-        elif input.type == "accessibility_summary":
-            # Get filtered tree showing only interactive elements
-            accessibility_tree = await page.accessibility.snapshot()
-            if accessibility_tree:
-                summary = _filter_interactive_elements(accessibility_tree)
-                return json.dumps(
-                    {"type": "accessibility_summary", "snapshot": summary}, indent=2
-                )
-            else:
-                return json.dumps({"type": "accessibility_summary", "snapshot": None}, indent=2)
 
-        elif input.type == "accessibility_scoped":
-            # Get accessibility tree scoped to specific element
-            if not input.selector_type or not input.selector:
-                return "Error: selector_type and selector required for accessibility_scoped"
-            
-            try:
-                selector = _build_selector(input.selector_type, input.selector)
-                element = await page.query_selector(selector)
-                if not element:
-                    return f"Error: Element not found with selector: {selector}"
-                
-                # Get scoped accessibility tree
-                scoped_tree = await page.accessibility.snapshot(root=element)
-                return json.dumps(
-                    {
-                        "type": "accessibility_scoped", 
-                        "selector": selector,
-                        "snapshot": scoped_tree
-                    }, 
-                    indent=2
-                )
-            except Exception as e:
-                return f"Error getting scoped accessibility tree: {str(e)}"
+async def _cdp_interactive_tree(session: Session) -> dict:
+    """Build the interactive/landmark tree from CDP Accessibility.queryAXTree
 
-        elif input.type == "image":
-            # Take a screenshot and return base64 encoded image
-            screenshot_bytes = await page.screenshot(
-                full_page=True, type="jpeg", quality=50
-            )
-            import base64
+    Each role is queried separately (concurrently, over one CDP session), so
+    only matching nodes are sent back. Nesting and document order come from a
+    single DOM.pushNodesByBackendIdsToFrontend call: Chromium answers it with
+    DOM.setChildNodes events for every level of the path down to each pushed
+    node, shadow roots included, so no per-node round-trips are needed.
+    """
+    cdp = await session.cdp_session()
+    events: list[dict] = []
 
-            screenshot_base64 = base64.b64encode(screenshot_bytes).decode("utf-8")
-            return json.dumps(
-                {
-                    "type": "image",
-                    "format": "jpeg",
-                    "data": screenshot_base64,
-                    "encoding": "base64",
-                },
-                indent=2,
-            )
+    def on_child_nodes(event: dict) -> None:
+        events.append(event)
 
-    except Exception as e:
-        return f"Error capturing {input.type} snapshot: {str(e)}"
+    # getDocument forgets the nodes this session was sent before, so every
+    # path is pushed in full again
+    document = (await cdp.send("DOM.getDocument", {"depth": 0}))["root"]
+    cdp.on("DOM.setChildNodes", on_child_nodes)
+    try:
+        title, *responses = await asyncio.gather(
+            cdp.send("Runtime.evaluate", {"expression": "document.title", "returnByValue": True}),
+            *(
+                cdp.send(
+                    "Accessibility.queryAXTree",
+                    {"backendNodeId": document["backendNodeId"], "role": role},
+                )
+                for role in _SUMMARY_ROLES
+            ),
+        )
+        ax_nodes = {}
+        for response in responses:
+            for ax_node in response["nodes"]:
+                if ax_node.get("ignored") or "backendDOMNodeId" not in ax_node:
+                    continue
+                ax_nodes.setdefault(ax_node["backendDOMNodeId"], ax_node)
+        ax_nodes = list(ax_nodes.values())
+
+        node_ids = []
+        if ax_nodes:
+            pushed = await cdp.send(
+                "DOM.pushNodesByBackendIdsToFrontend",
+                {"backendNodeIds": [ax_node["backendDOMNodeId"] for ax_node in ax_nodes]},
+            )
+            node_ids = pushed["nodeIds"]
+    finally:
+        cdp.remove_listener("DOM.setChildNodes", on_child_nodes)
+        # Stop DOM mutation events for the pushed nodes until the next snapshot
+        await cdp.send("DOM.disable")
+
+    # Parent and position among siblings of every node on the pushed paths
+    parent_of = {}
+    position = {}
+    for event in events:
+        for index, node in enumerate(event["nodes"]):
+            parent_of[node["nodeId"]] = event["parentId"]
+            position[node["nodeId"]] = index
+            shadow_roots = node.get("shadowRoots", [])
+            for shadow_index, shadow_root in enumerate(shadow_roots):
+                parent_of[shadow_root["nodeId"]] = node["nodeId"]
+                # Shadow content renders in place of the host's light children
+                position[shadow_root["nodeId"]] = shadow_index - len(shadow_roots)
+
+    matched = {node_id: index for index, node_id in enumerate(node_ids) if node_id}
+    parents = [-1] * len(ax_nodes)
+    order_keys = [()] * len(ax_nodes)
+    for node_id, index in matched.items():
+        path = [position.get(node_id, 0)]
+        ancestor = parent_of.get(node_id)
+        while ancestor is not None:
+            if parents[index] < 0 and ancestor in matched:
+                parents[index] = matched[ancestor]
+            path.append(position.get(ancestor, 0))
+            ancestor = parent_of.get(ancestor)
+        order_keys[index] = (0, *reversed(path))
+    for index, node_id in enumerate(node_ids):
+        if not node_id:
+            # Not pushable (e.g. in another document): keep it, at the end of the root
+            order_keys[index] = (1, index)
+
+    root = {"role": "WebArea", "name": title["result"].get("value")}
+    summaries = []
+    for ax_node in ax_nodes:
+        role = ax_node["role"]["value"]
+        summary = {"role": role, "name": ax_node.get("name", {}).get("value")}
+        if role in INTERACTIVE_ROLES:
+            if ax_node.get("value", {}).get("value") not in (None, ""):
+                summary["value"] = ax_node["value"]["value"]
+            for prop in ax_node.get("properties", []):
+                if prop["name"] in INTERACTIVE_ATTRIBUTES:
+                    summary[prop["name"]] = _ax_property(prop["value"])
+        summaries.append(summary)
+
+    # Every node exists before any is attached, so the attach order only decides
+    # sibling order and cannot reach a parent that was not built yet
+    for index in sorted(range(len(ax_nodes)), key=lambda i: order_keys[i]):
+        parent = root if parents[index] < 0 else summaries[parents[index]]
+        parent.setdefault("children", []).append(summaries[index])
+
+    return root
 
 
 @mcp.tool()
-async def fillInput(input: FillInputInput) -> str:
-    """Fill text into form input fields like search boxes, text areas, and input forms. This is the preferred method for entering text into form elements as it properly handles input events and validation. Can target inputs by CSS class, ID, placeholder text, associated labels, or visible text."""
+@_instrumented
+async def getSnapshot(
+    input: SnapshotInput,
+) -> str | ImageContent | list[TextContent | ImageContent]:
+    """Capture page state as accessibility tree or screenshot. Use 'accessibility_summary' for interactive elements overview, 'accessibility_scoped' to explore specific sections, 'accessibility' for full tree (avoid for large pages), 'accessibility_diff' to get only what changed since the last accessibility snapshot, 'image' for visual confirmation."""
     ctx = mcp.get_context()
-    page = get_active_page(ctx)
+    async with get_active_session(ctx, input.session_id) as session:
+        page = session.page
+        try:
+            if input.type == "accessibility":
+                # Get full accessibility tree snapshot (use sparingly)
+                with metrics.timer("accessibility_snapshot"):
+                    accessibility_tree = await page.accessibility.snapshot()
+                session.last_accessibility = _flatten_accessibility_tree(
+                    accessibility_tree
+                )
+                return _dump(
+                    {"type": "accessibility", "snapshot": accessibility_tree},
+                    input.output_format,
+                )
+
+            elif input.type == "accessibility_diff":
+                # Return only the delta against the previous tree for this session
+                with metrics.timer("accessibility_snapshot"):
+                    accessibility_tree = await page.accessibility.snapshot()
+                current = _flatten_accessibility_tree(accessibility_tree)
+                previous = session.last_accessibility
+                session.last_accessibility = current
+
+                if previous is None:
+                    # Nothing to diff against yet, so the full tree is the baseline
+                    return _dump(
+                        {
+                            "type": "accessibility_diff",
+                            "baseline": True,
+                            "snapshot": accessibility_tree,
+                        },
+                        input.output_format,
+                    )
+
+                diff = _diff_accessibility_trees(previous, current)
+                return _dump(
+                    {
+                        "type": "accessibility_diff",
+                        "baseline": False,
+                        "unchanged": not any(diff.values()),
+                        **diff,
+                    },
+                    input.output_format,
+                )
+
+            elif input.type == "accessibility_summary":
+                budget = None
+                if input.max_bytes or input.max_tokens:
+                    budget = min(
+                        input.max_bytes or sys.maxsize,
+                        (input.max_tokens or sys.maxsize) * BYTES_PER_TOKEN,
+                    )
+                engine = input.engine or os.environ.get("MUDAE_SNAPSHOT_ENGINE", "playwright")
+                cache_key = ("accessibility_summary", engine, budget, input.output_format)
+                cached = session.cached_snapshot(cache_key)
+                if cached is not None:
+                    return cached
+                epoch = session.dom_epoch
+
+                if engine == "cdp":
+                    # Filtering happens in the browser; the tree holds only relevant nodes
+                    with metrics.timer("cdp_ax_query"):
+                        accessibility_tree = await _cdp_interactive_tree(session)
+                    _assign_refs(session, accessibility_tree)
+                    if budget is not None:
+                        result = _dump_budgeted_summary(
+                            accessibility_tree, budget, input.output_format
+                        )
+                    else:
+                        result = _dump(
+                            {"type": "accessibility_summary", "snapshot": accessibility_tree},
+                            input.output_format,
+                        )
+                    session.store_snapshot(cache_key, epoch, result)
+                    return result
+
+                # Get filtered tree showing only interactive elements
+                with metrics.timer("accessibility_snapshot"):
+                    accessibility_tree = await page.accessibility.snapshot()
+                # Numbering needs the whole tree, so refs are assigned before filtering
+                _assign_refs(session, accessibility_tree)
+                if accessibility_tree and budget is not None:
+                    result = _dump_budgeted_summary(
+                        accessibility_tree, budget, input.output_format
+                    )
+                elif accessibility_tree:
+                    with metrics.timer("filter"):
+                        summary = _filter_interactive_elements(accessibility_tree)
+                    result = _dump(
+                        {"type": "accessibility_summary", "snapshot": summary},
+                        input.output_format,
+                    )
+                else:
+                    result = _dump({"type": "accessibility_summary", "snapshot": None}, input.output_format)
+                session.store_snapshot(cache_key, epoch, result)
+                return result
+
+            elif input.type == "accessibility_scoped":
+                # Get accessibility tree scoped to specific element
+                if not input.selector_type or not input.selector:
+                    return "Error: selector_type and selector required for accessibility_scoped"
+            
+                cache_key = (
+                    "accessibility_scoped",
+                    input.selector_type,
+                    input.selector,
+                    input.output_format,
+                )
+                cached = session.cached_snapshot(cache_key)
+                if cached is not None:
+                    return cached
+                epoch = session.dom_epoch
+
+                try:
+                    selector = _build_selector(input.selector_type, input.selector)
+                    element = await page.query_selector(selector)
+                    if not element:
+                        return f"Error: Element not found with selector: {selector}"
+                
+                    # Get scoped accessibility tree
+                    with metrics.timer("accessibility_snapshot"):
+                        scoped_tree = await page.accessibility.snapshot(root=element)
+                    result = _dump(
+                        {
+                            "type": "accessibility_scoped", 
+                            "selector": selector,
+                            "snapshot": scoped_tree
+                        },
+                        input.output_format,
+                    )
+                    session.store_snapshot(cache_key, epoch, result)
+                    return result
+                except Exception as e:
+                    return f"Error getting scoped accessibility tree: {str(e)}"
+
+            elif input.type == "image":
+                # Returned as native MCP image content rather than JSON-wrapped base64
+                return await _capture_screenshot(session, input)
+
+            elif input.type == "image_tiles":
+                # Page through a long document without materializing one huge bitmap
+                return await _capture_tiles(session, input)
+
+        except Exception as e:
+            return f"Error capturing {input.type} snapshot: {str(e)}"
+
+
+async def _perform_fill(session: Session, input: FillInputInput) -> str:
+    """Fill an input in a session; shared by fillInput and batchActions"""
+    page = session.page
 
     # Build selector based on type
-    if input.type == "className":
+    if input.ref is not None:
+        if input.ref not in session.refs:
+            return _unknown_ref_error(input.ref)
+        selector = f"ref={input.ref}"
+    elif input.type is None or input.selector is None:
+        return "Error: Either 'ref' or both 'type' and 'selector' are required"
+    elif input.type == "className":
         selector = f".{input.selector}"
     elif input.type == "id":
         selector = f"#{input.selector}"
@@ -420,8 +2989,14 @@ async def fillInput(input: FillInputInput) -> str:
         return f"Error: Invalid type '{input.type}'. Must be 'className', 'id', 'text', 'placeholder', or 'label'"
 
     try:
-        # Use Playwright's fill method for input fields
-        await page.fill(selector, input.value)
+        if input.ref is not None:
+            element = await session.resolve_ref(input.ref)
+            if not element:
+                return f"Element not found with selector: {selector}"
+            await element.fill(input.value)
+        else:
+            # Use Playwright's fill method for input fields
+            await page.fill(selector, input.value)
         return f"Successfully filled '{input.value}' into input field with selector: {selector}"
 
     except Exception as e:
@@ -429,93 +3004,236 @@ async def fillInput(input: FillInputInput) -> str:
 
 
 @mcp.tool()
+@_instrumented
+async def fillInput(input: FillInputInput) -> str:
+    """Fill text into form input fields like search boxes, text areas, and input forms. This is the preferred method for entering text into form elements as it properly handles input events and validation. Can target inputs by CSS class, ID, placeholder text, associated labels, or visible text, or by a ref from an accessibility_summary snapshot."""
+    ctx = mcp.get_context()
+    async with get_active_session(ctx, input.session_id, mutates=True) as session:
+        return await _perform_fill(session, input)
+
+
+_BATCH_STEP_RUNNERS = {
+    "getElement": _perform_element_action,
+    "fillInput": _perform_fill,
+    "navigate": _perform_navigation,
+}
+
+
+def _is_error_result(result: str) -> bool:
+    """Tools report failures as strings; these are the prefixes they use"""
+    return result.startswith(("Error", "Element not found"))
+
+
+@mcp.tool()
+@_instrumented
+async def batchActions(input: BatchActionsInput) -> str:
+    """Run an ordered list of getElement, fillInput and navigate steps in one call. Use this for multi-step flows such as filling and submitting a form, instead of calling each tool separately. Stops at the first failing step unless stop_on_error is false."""
+    ctx = mcp.get_context()
+    async with get_active_session(ctx, input.session_id, mutates=True) as session:
+        results = []
+        for index, step in enumerate(input.steps):
+            timeout = (
+                step.step_timeout_ms if step.step_timeout_ms is not None else input.step_timeout_ms
+            ) / 1000
+            started = time.perf_counter()
+            try:
+                # Steps report in compact JSON so their results can be embedded
+                step_input = step.model_copy(update={"output_format": "compact"})
+                result = await asyncio.wait_for(
+                    _BATCH_STEP_RUNNERS[step.tool](session, step_input), timeout
+                )
+            except asyncio.TimeoutError:
+                result = f"Error: step timed out after {timeout:g}s"
+
+            ok = not _is_error_result(result)
+            if result.startswith("{"):
+                # getText/extractLinks/getRawElement already return JSON
+                result = json.loads(result)
+            results.append(
+                {
+                    "index": index,
+                    "tool": step.tool,
+                    "ok": ok,
+                    "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+                    "result": result,
+                }
+            )
+            if not ok and input.stop_on_error:
+                break
+
+        return _dump(
+            {
+                "ok": len(results) == len(input.steps)
+                and all(r["ok"] for r in results),
+                "completed": len(results),
+                "total": len(input.steps),
+                "steps": results,
+            },
+            input.output_format,
+        )
+
+
+@mcp.tool()
+@_instrumented
 async def exploreByRole(input: ExploreByRoleInput) -> str:
     """Explore page sections by ARIA landmark roles. This provides a semantic overview of page structure and helps identify where different types of content are located. Use this to understand page layout before diving into specific sections."""
     ctx = mcp.get_context()
-    page = get_active_page(ctx)
-
-    try:
-        # Find all elements with the specified role
-        elements = await page.locator(f"[role='{input.role}']").all()
+    async with get_active_session(ctx, input.session_id) as session:
+        page = session.page
+        cache_key = ("exploreByRole", input.role, input.output_format)
+        cached = session.cached_snapshot(cache_key)
+        if cached is not None:
+            return cached
+        epoch = session.dom_epoch
+
+        try:
+            # Find all elements with the specified role
+            selectors = [f"[role='{input.role}']"]
         
-        # Also check for implicit roles (semantic HTML elements)
-        implicit_selectors = {
-            'banner': 'header',
-            'main': 'main', 
-            'navigation': 'nav',
-            'contentinfo': 'footer',
-            'form': 'form',
-            'article': 'article',
-            'section': 'section',
-            'complementary': 'aside',
-            'search': '[role="search"]'  # search is typically explicit
-        }
+            # Also check for implicit roles (semantic HTML elements)
+            implicit_selectors = {
+                'banner': 'header',
+                'main': 'main', 
+                'navigation': 'nav',
+                'contentinfo': 'footer',
+                'form': 'form',
+                'article': 'article',
+                'section': 'section',
+                'complementary': 'aside',
+                'search': '[role="search"]'  # search is typically explicit
+            }
         
-        if input.role in implicit_selectors and input.role != 'search':
-            implicit_elements = await page.locator(implicit_selectors[input.role]).all()
-            elements.extend(implicit_elements)
+            if input.role in implicit_selectors and input.role != 'search':
+                selectors.append(implicit_selectors[input.role])
+
+            # A single union selector returns each element once, in document order,
+            # even when it matches both the explicit and the implicit role
+            elements = await page.query_selector_all(", ".join(selectors))
+
+            if not elements:
+                return _dump({
+                    "role": input.role,
+                    "found": False,
+                    "message": f"No elements found with role '{input.role}'"
+                }, input.output_format)
+
+            # Get accessibility info for each element, a bounded number at a time
+            semaphore = asyncio.Semaphore(EXPLORE_CONCURRENCY)
+
+            async def inspect(i, element_handle):
+                try:
+                    # Get the accessibility snapshot for this specific element
+                    async with semaphore:
+                        scoped_tree = await page.accessibility.snapshot(root=element_handle)
+                except Exception:
+                    # Skip elements that can't be accessed
+                    return None
+                if not scoped_tree:
+                    return None
+                processed = _process_accessibility_tree(scoped_tree, max_depth=0, full=True)
+                # Simplify the output - just key info
+                return {
+                    "index": i,
+                    "name": scoped_tree.get('name'),
+                    "role": scoped_tree.get('role'),
+                    "children_count": len(scoped_tree.get('children', [])),
+                    "node_count": processed.node_count,
+                    "has_interactive_elements": processed.has_interactive
+                }
+
+            sections = await asyncio.gather(
+                *(inspect(i, element) for i, element in enumerate(elements))
+            )
+            role_sections = [section for section in sections if section]
 
-        if not elements:
-            return json.dumps({
+            result = _dump({
                 "role": input.role,
-                "found": False,
-                "message": f"No elements found with role '{input.role}'"
-            }, indent=2)
+                "found": True,
+                "count": len(role_sections),
+                "sections": role_sections
+            }, input.output_format)
+            session.store_snapshot(cache_key, epoch, result)
+            return result
 
-        # Get accessibility info for each element
-        role_sections = []
-        for i, element in enumerate(elements):
-            try:
-                # Get the accessibility snapshot for this specific element
-                element_handle = await element.element_handle()
-                if element_handle:
-                    scoped_tree = await page.accessibility.snapshot(root=element_handle)
-                    if scoped_tree:
-                        # Simplify the output - just key info
-                        section_info = {
-                            "index": i,
-                            "name": scoped_tree.get('name'),
-                            "role": scoped_tree.get('role'),
-                            "children_count": len(scoped_tree.get('children', [])),
-                            "has_interactive_elements": _has_interactive_children(scoped_tree)
-                        }
-                        role_sections.append(section_info)
-            except Exception as e:
-                # Skip elements that can't be accessed
-                continue
+        except Exception as e:
+            return f"Error exploring by role '{input.role}': {str(e)}"
 
-        return json.dumps({
-            "role": input.role,
-            "found": True,
-            "count": len(role_sections),
-            "sections": role_sections
-        }, indent=2)
 
-    except Exception as e:
-        return f"Error exploring by role '{input.role}': {str(e)}"
+@mcp.tool()
+async def getMetrics(input: MetricsInput) -> str:
+    """Report server metrics: call counts, error counts, latency (p50/p95/max) and response sizes for each tool and action/type, plus time spent in internal phases such as accessibility snapshots, filtering, screenshots and serialization."""
+    if input.format == "prometheus":
+        result = metrics.prometheus()
+    else:
+        browsers = mcp.get_context().request_context.lifespan_context.browsers
+        payload = metrics.snapshot()
+        payload["browsers"] = [
+            {
+                "name": manager.name,
+                "endpoint": manager.cdp_url,
+                "started": manager.browser is not None,
+                "sessions": manager.sessions,
+            }
+            for manager in browsers.managers
+        ]
+        result = _dump(payload, input.output_format)
+    if input.reset:
+        metrics.reset()
+    return result
 
 
-def _has_interactive_children(node):
-    """Check if a node has any interactive children"""
-    if not node:
-        return False
-    
-    interactive_roles = {
-        'button', 'link', 'textbox', 'combobox', 'listbox', 'option', 
-        'checkbox', 'radio', 'tab', 'menuitem', 'treeitem', 'gridcell',
-        'columnheader', 'rowheader', 'searchbox', 'slider', 'spinbutton'
-    }
-    
-    role = node.get('role', '').lower()
-    if role in interactive_roles:
-        return True
-    
-    for child in node.get('children', []):
-        if _has_interactive_children(child):
-            return True
-    
-    return False
+def main() -> None:
+    """Entry point: apply command-line options, then run the MCP server"""
+    parser = argparse.ArgumentParser(prog="mudae", description="Better Playwright MCP server")
+    headless = parser.add_mutually_exclusive_group()
+    headless.add_argument(
+        "--headless", dest="headless", action="store_true", default=None,
+        help="Launch Chromium headless (default; env MUDAE_HEADLESS)",
+    )
+    headless.add_argument(
+        "--headed", dest="headless", action="store_false",
+        help="Launch Chromium with a visible window",
+    )
+    parser.add_argument(
+        "--browser-arg", action="append", default=[], metavar="FLAG",
+        help="Extra Chromium flag, repeatable (env MUDAE_BROWSER_ARGS)",
+    )
+    parser.add_argument(
+        "--browsers", type=int, metavar="N",
+        help="Number of browser processes to spread sessions over (env MUDAE_BROWSERS, default 1)",
+    )
+    parser.add_argument(
+        "--viewport", metavar="WIDTHxHEIGHT",
+        help="Viewport size for new sessions, e.g. 1280x720 (env MUDAE_VIEWPORT)",
+    )
+    parser.add_argument(
+        "--device-scale-factor", type=float, metavar="SCALE",
+        help="Device scale factor for new sessions (env MUDAE_DEVICE_SCALE_FACTOR)",
+    )
+    parser.add_argument(
+        "--output-format", choices=["pretty", "compact", "text"],
+        help="Default format for tool results (env MUDAE_OUTPUT_FORMAT, default pretty)",
+    )
+    args = parser.parse_args()
+
+    # Flags override the environment, which is where the server reads its settings
+    if args.headless is not None:
+        os.environ["MUDAE_HEADLESS"] = "1" if args.headless else "0"
+    if args.browser_arg:
+        os.environ["MUDAE_BROWSER_ARGS"] = " ".join(
+            [os.environ.get("MUDAE_BROWSER_ARGS", ""), shlex.join(args.browser_arg)]
+        ).strip()
+    if args.browsers:
+        os.environ["MUDAE_BROWSERS"] = str(args.browsers)
+    if args.viewport:
+        os.environ["MUDAE_VIEWPORT"] = args.viewport
+    if args.device_scale_factor:
+        os.environ["MUDAE_DEVICE_SCALE_FACTOR"] = str(args.device_scale_factor)
+    if args.output_format:
+        os.environ["MUDAE_OUTPUT_FORMAT"] = args.output_format
+
+    mcp.run()
 
 
 if __name__ == "__main__":
-    mcp.run()
+    main()
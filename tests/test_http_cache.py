@@ -0,0 +1,125 @@
+import asyncio
+import os
+import time
+from email.utils import formatdate
+
+from mudae.main import HEURISTIC_FRESHNESS_CAP, HttpCache, _freshness
+
+NOW = 1_700_000_000.0
+FRESH = {"cache-control": "max-age=60"}
+
+
+def test_freshness_from_max_age_minus_age():
+    assert _freshness(FRESH, NOW) == 60
+    assert _freshness({**FRESH, "age": "10"}, NOW) == 50
+
+
+def test_freshness_from_expires():
+    headers = {"date": formatdate(NOW, usegmt=True), "expires": formatdate(NOW + 120, usegmt=True)}
+    assert _freshness(headers, NOW) == 120
+
+
+def test_freshness_heuristic_from_last_modified_is_capped():
+    date = formatdate(NOW, usegmt=True)
+    five_days = {"date": date, "last-modified": formatdate(NOW - 5 * 86400, usegmt=True)}
+    assert _freshness(five_days, NOW) == 0.1 * 5 * 86400
+    long_ago = {"date": date, "last-modified": formatdate(NOW - 100 * 86400, usegmt=True)}
+    assert _freshness(long_ago, NOW) == HEURISTIC_FRESHNESS_CAP
+
+
+def test_user_specific_responses_are_not_stored():
+    assert _freshness({"cache-control": "private, max-age=60"}, NOW) is None
+    assert _freshness({"cache-control": "no-store"}, NOW) is None
+    assert _freshness({**FRESH, "set-cookie": "id=1"}, NOW) is None
+    assert _freshness({**FRESH, "vary": "Cookie"}, NOW) is None
+    assert _freshness({**FRESH, "vary": "Accept-Encoding"}, NOW) == 60
+
+
+def test_stale_responses_are_kept_only_if_revalidatable():
+    assert _freshness({"cache-control": "no-cache"}, NOW) is None
+    assert _freshness({"cache-control": "no-cache", "etag": '"a"'}, NOW) == 0
+
+
+def store(cache, url, body, headers=FRESH, status=200):
+    asyncio.run(cache.store(url, status, headers, body))
+
+
+def test_store_and_read_back(tmp_path):
+    cache = HttpCache(str(tmp_path), 1000)
+    store(cache, "https://example.com/", b"hello", {**FRESH, "content-length": "5"})
+
+    cached = cache.lookup("https://example.com/")
+    assert cached.status == 200
+    assert "content-length" not in cached.headers
+    assert asyncio.run(cache.read_body(cached)) == b"hello"
+
+
+def test_uncacheable_and_oversized_responses_are_skipped(tmp_path):
+    cache = HttpCache(str(tmp_path), 800)
+    store(cache, "https://example.com/error", b"x", status=500)
+    store(cache, "https://example.com/large", b"x" * 101)
+    assert not cache.entries
+    assert cache.total == 0
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    cache = HttpCache(str(tmp_path), 800)
+    for index in range(8):
+        store(cache, f"https://example.com/{index}", b"x" * 100)
+    cache.lookup("https://example.com/0")
+    store(cache, "https://example.com/8", b"x" * 100)
+
+    assert "https://example.com/0" in cache.entries
+    assert "https://example.com/1" not in cache.entries
+    assert cache.total == 800
+
+
+def test_replacing_an_entry_keeps_the_total_exact(tmp_path):
+    cache = HttpCache(str(tmp_path), 1000)
+    store(cache, "https://example.com/", b"x" * 100)
+    store(cache, "https://example.com/", b"x" * 40)
+
+    async def concurrently():
+        await asyncio.gather(
+            *(cache.store("https://example.com/", 200, FRESH, b"x" * 60) for _ in range(3))
+        )
+
+    asyncio.run(concurrently())
+    assert len(cache.entries) == 1
+    assert cache.total == 60
+
+
+def test_entries_survive_a_restart(tmp_path):
+    cache = HttpCache(str(tmp_path), 1000)
+    store(cache, "https://example.com/a", b"a" * 10)
+    store(cache, "https://example.com/b", b"b" * 20)
+
+    reloaded = HttpCache(str(tmp_path), 1000)
+    assert set(reloaded.entries) == {"https://example.com/a", "https://example.com/b"}
+    assert reloaded.total == 30
+    cached = reloaded.lookup("https://example.com/b")
+    assert asyncio.run(reloaded.read_body(cached)) == b"b" * 20
+
+
+def test_failed_write_leaves_no_entry(tmp_path, monkeypatch):
+    cache = HttpCache(str(tmp_path), 1000)
+
+    def disk_full(*args):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(cache, "_write", disk_full)
+    store(cache, "https://example.com/", b"hello")
+    assert not cache.entries
+    assert cache.total == 0
+    assert not os.listdir(tmp_path)
+
+
+def test_revalidation_refreshes_a_stale_entry(tmp_path):
+    cache = HttpCache(str(tmp_path), 1000)
+    store(cache, "https://example.com/", b"hello", {"cache-control": "no-cache", "etag": '"a"'})
+    cached = cache.lookup("https://example.com/")
+    assert not cached.fresh(time.time())
+    assert cached.validators() == {"if-none-match": '"a"'}
+
+    asyncio.run(cache.revalidated(cached, FRESH))
+    assert cache.lookup("https://example.com/").lifetime == 60
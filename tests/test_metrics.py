@@ -0,0 +1,30 @@
+from mudae.main import LATENCY_BUCKETS, Histogram
+
+
+def test_empty_histogram_has_no_quantiles():
+    assert Histogram().quantile(0.5) is None
+
+
+def test_quantile_falls_inside_the_observed_bucket():
+    histogram = Histogram()
+    for _ in range(100):
+        histogram.observe(0.003)
+    assert 0.0025 <= histogram.quantile(0.5) <= 0.003
+    assert histogram.quantile(0.95) <= histogram.max
+
+
+def test_quantiles_follow_the_distribution():
+    histogram = Histogram()
+    for _ in range(90):
+        histogram.observe(0.002)
+    for _ in range(10):
+        histogram.observe(0.4)
+    assert histogram.quantile(0.5) <= 0.0025
+    assert 0.25 <= histogram.quantile(0.95) <= 0.4
+
+
+def test_overflow_bucket_is_bounded_by_the_maximum():
+    histogram = Histogram()
+    histogram.observe(LATENCY_BUCKETS[-1] * 2)
+    assert histogram.quantile(0.99) <= histogram.max
+    assert histogram.summary()["max_ms"] == LATENCY_BUCKETS[-1] * 2 * 1000
@@ -0,0 +1,95 @@
+import json
+
+import pytest
+
+from mudae.main import (
+    _budget_interactive_elements,
+    _dump_budgeted_summary,
+    _filter_interactive_elements,
+    _render_text,
+)
+
+
+def page_tree(links: int = 40, buttons: int = 120) -> dict:
+    return {
+        "role": "WebArea",
+        "name": "Fixture",
+        "children": [
+            {
+                "role": "navigation",
+                "name": "Site",
+                "children": [{"role": "link", "name": f"Link {i}"} for i in range(links)],
+            },
+            {
+                "role": "main",
+                "children": [
+                    {
+                        "role": "generic",
+                        "children": [
+                            {"role": "button", "name": f"Button {i}"} for i in range(buttons)
+                        ],
+                    }
+                ],
+            },
+        ],
+    }
+
+
+def walk(node):
+    yield node
+    for child in node.get("children", []):
+        yield from walk(child)
+
+
+@pytest.mark.parametrize("output_format", ["compact", "pretty", "text"])
+@pytest.mark.parametrize("max_bytes", [600, 2000, 6000])
+def test_budgeted_summary_fits_in_every_format(output_format, max_bytes):
+    result = _dump_budgeted_summary(page_tree(), max_bytes, output_format)
+    assert len(result.encode()) <= max_bytes
+
+
+def test_large_budget_keeps_the_whole_summary():
+    tree = page_tree()
+    summary, stats = _budget_interactive_elements(tree, 1_000_000)
+    assert summary == _filter_interactive_elements(tree, max_depth=None)
+    assert stats["truncated_nodes"] == 0
+
+
+def test_truncation_counts_every_omitted_node():
+    tree = page_tree()
+    total = sum(1 for _ in walk(_filter_interactive_elements(tree, max_depth=None)))
+    summary, stats = _budget_interactive_elements(tree, 1500)
+
+    kept = list(walk(summary))
+    assert stats["nodes"] == len(kept)
+    assert sum(node.get("truncated", 0) for node in kept) == stats["truncated_nodes"]
+    assert stats["nodes"] + stats["truncated_nodes"] == total
+
+
+def test_truncated_summary_keeps_document_order():
+    tree = page_tree()
+    order = [node.get("name") for node in walk(_filter_interactive_elements(tree, max_depth=None))]
+    summary, _ = _budget_interactive_elements(tree, 1500)
+
+    positions = [order.index(node.get("name")) for node in walk(summary)]
+    assert positions == sorted(positions)
+
+
+def test_budgeted_summary_reports_the_requested_budget():
+    result = json.loads(_dump_budgeted_summary(page_tree(), 2000, "compact"))
+    assert result["budget"]["max_bytes"] == 2000
+
+
+def test_render_text_puts_each_node_on_one_line():
+    tree = {
+        "role": "main",
+        "children": [{"role": "button", "name": "Save draft", "disabled": True}],
+    }
+    assert _render_text(tree) == 'main\n  - button "Save draft" disabled=true'
+
+
+def test_render_text_keeps_nested_fields_of_role_bearing_results():
+    result = {"role": "link", "count": 1, "matches": [{"name": "Home", "ref": "e1"}]}
+    text = _render_text(result)
+    assert "matches:" in text
+    assert "- name=Home ref=e1" in text